@@ -0,0 +1,371 @@
+# Built-in modules
+import numpy as np
+import argparse as ap
+import contextlib as cl
+import datetime as dt
+import json as js
+import os
+import platform as pl
+import shutil as sh
+import subprocess as sp
+import sys as sy
+import tempfile as tf
+import time as tm
+
+# BoloCalc modules
+_root = os.path.abspath(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sy.path.insert(0, _root)
+import src.atmosphere as at  # noqa: E402
+import src.simulation as sm  # noqa: E402
+import src.unpack as up  # noqa: E402
+import src.vary as vr  # noqa: E402
+import gen_experiment as ge  # noqa: E402
+
+# Times BoloCalc on synthetic experiments written by gen_experiment.py, so
+# that performance work can be measured offline against a reproducible
+# workload. Each workload size is generated from the same seed, and each
+# benchmark reports the minimum and median of '--repeat' timings
+#
+# Example:
+#    $ python auxil/benchmark.py --sizes small medium --out bench.json
+
+# Workload sizes: generator arguments, simulation inputs, and the number
+# of values of each varied parameter
+sizes = {
+    "small": {"ntel": 1, "ncam": 1, "nch": 2, "nopt": 6, "nexp": 2,
+              "nobs": 4, "ndet": 4, "fres": 1.0, "nstep": 3},
+    "medium": {"ntel": 2, "ncam": 2, "nch": 3, "nopt": 8, "nexp": 5,
+               "nobs": 10, "ndet": 10, "fres": 0.5, "nstep": 5},
+    "large": {"ntel": 3, "ncam": 4, "nch": 4, "nopt": 12, "nexp": 10,
+              "nobs": 10, "ndet": 20, "fres": 0.25, "nstep": 5}}
+# Budget for the command-line startup benchmarks, which run in a fresh
+# interpreter [s]
+startup_budget = 0.5
+
+
+class Benchmark:
+    """
+    Benchmark object times the simulation, parameter vary, sensitivity,
+    physics, sky, atmosphere, and unpacking code paths on one synthetic
+    experiment
+
+    Args:
+    name (str): workload size name
+    size (dict): workload size, as in 'sizes'
+    work_dir (str): directory in which to write the experiment
+    repeat (int): number of timings of each benchmark
+    jobs (int): number of worker processes for simulating and varying
+    seed (int): random seed of the generated experiment and simulation
+    atm_file (str): synthetic HDF5 atmosphere file, or None to skip the
+    atmosphere benchmarks
+    startup_exp (str): existing experiment directory, e.g. the example
+    experiment, whose setup is also timed. Defaults to None
+
+    Attributes:
+    results (dict): timings keyed by benchmark name
+    """
+    def __init__(self, name, size, work_dir, repeat=3, jobs=1, seed=0,
+                 atm_file=None, startup_exp=None):
+        # Store passed parameters
+        self._name = name
+        self._size = size
+        self._repeat = repeat
+        self._jobs = jobs
+        self._seed = seed
+        self._atm_file = atm_file
+        self._startup_exp = startup_exp
+
+        self.results = {}
+        self._dir = os.path.join(work_dir, name)
+        # Unpack labels outputs by their path below 'Experiments'
+        self._exp_dir = os.path.join(self._dir, "Experiments", "Bench", "V0")
+        self._log_file = os.path.join(self._dir, "log.txt")
+        self._sim_file = os.path.join(self._dir, "simulationInputs.txt")
+        self._snap_file = os.path.join(self._dir, "simulationInputsSnap.txt")
+        self._vary_file = os.path.join(self._dir, "paramsToVary.txt")
+        self._sweep_file = os.path.join(self._dir, "paramsToSweep.txt")
+        # Minimum duration of one timing of the fast benchmarks [s]
+        self._min_time = 0.2
+
+    # ***** Public Methods *****
+    def run(self):
+        """ Generate the experiment and run every benchmark """
+        self._generate()
+        self._time_startup()
+        self._time("Simulation.__init__", lambda: self._new_sim())
+        self._time("Simulation.__init__ (snapshot)",
+                   lambda sim: self._new_sim(self._snap_file),
+                   setup=lambda: self._new_sim(self._snap_file))
+        self._time("Simulation.simulate",
+                   lambda sim: sim.simulate(self._jobs),
+                   setup=lambda: self._new_sim())
+        self._time("Vary.vary", lambda vary: vary.vary(self._jobs),
+                   setup=lambda: self._new_vary(self._vary_file, True))
+        self._time("Vary.vary (sweep)", lambda vary: vary.vary(self._jobs),
+                   setup=lambda: self._new_vary(self._sweep_file, False))
+        # The remaining benchmarks share one evaluated realization
+        sim = self._new_sim()
+        with self._quiet():
+            sim.seed_exp(sim.exp, 0)
+            sim.exp.evaluate()
+        chs = [ch for tel in sim.exp.tels.values()
+               for cam in tel.cams.values() for ch in cam.chs.values()]
+        self._time("Sensitivity.ch_sensitivity",
+                   lambda: [sim.sns.ch_sensitivity(ch) for ch in chs],
+                   auto=True)
+        self._time_physics(sim, chs)
+        self._time_sky(sim, chs)
+        self._time_atm(sim, chs)
+        self._time_unpack()
+        return self.results
+
+    # ***** Helper Methods *****
+    def _generate(self):
+        """ Write the experiment, simulation inputs, and vary files """
+        if os.path.isdir(self._dir):
+            sh.rmtree(self._dir)
+        size = self._size
+        ge.generate(self._exp_dir, size["ntel"], size["ncam"], size["nch"],
+                    size["nopt"], seed=self._seed)
+        for fname, snap in [(self._sim_file, False), (self._snap_file, True)]:
+            ge.write_sim_file(fname, size["nexp"], size["nobs"],
+                              size["ndet"], size["fres"], seed=self._seed,
+                              snap=snap)
+        ge.write_vary_file(self._vary_file, size["nstep"])
+        ge.write_vary_file(self._sweep_file, 10 * size["nstep"], sweep=True)
+        return
+
+    def _new_sim(self, sim_file=None):
+        """ Simulation of the experiment """
+        if sim_file is None:
+            sim_file = self._sim_file
+        with self._quiet():
+            return sm.Simulation(self._log_file, sim_file, self._exp_dir)
+
+    def _new_vary(self, param_file, vary_tog):
+        """ Vary object of a new simulation """
+        sim = self._new_sim()
+        with self._quiet():
+            return vr.Vary(sim, param_file, "bench", vary_tog)
+
+    def _time_startup(self):
+        """
+        Time the command-line startup in a fresh interpreter, i.e. with
+        the cost of imports, against 'startup_budget'
+        """
+        calc = os.path.join(_root, "calcBolos.py")
+        exps = [("", self._exp_dir)]
+        if self._startup_exp is not None:
+            exps.append((" (startup exp)",
+                         os.path.abspath(self._startup_exp)))
+        names = ["Startup: calcBolos.py --help"]
+        self._time(names[0], lambda: self._run([calc, "--help"]))
+        for label, exp_dir in exps:
+            names.append("Startup: Simulation setup" + label)
+            self._time(names[-1], lambda: self._run([
+                "-c", "import src.simulation as sm; sm.Simulation(%r, %r, %r)"
+                % (self._log_file, self._sim_file, exp_dir)]))
+        for name in names:
+            res = self.results[name]
+            res["budget"] = startup_budget
+            if res["median"] > startup_budget:
+                print("%-8s %-34s over the %.2f s budget" % (
+                    self._name, name, startup_budget))
+        return
+
+    def _run(self, args):
+        """ Run a fresh python interpreter from the BoloCalc directory """
+        sp.run([sy.executable] + args, cwd=_root, check=True,
+               stdout=sp.DEVNULL, stderr=sp.DEVNULL)
+        return
+
+    def _time_physics(self, sim, chs):
+        """ Time the Physics kernels on the channel frequency grids """
+        phys = sim.phys
+        rng = np.random.RandomState(self._seed)
+        # Element temperatures [K] broadcast against the frequencies
+        temps = rng.uniform(0.1, 300., (self._size["nopt"], 1))
+        kernels = {
+            "bb_pow_spec": lambda f: phys.bb_pow_spec(f, temps, 0.01),
+            "ani_pow_spec": lambda f: phys.ani_pow_spec(f, temps, 0.01),
+            "n_occ": lambda f: phys.n_occ(f, temps),
+            "dielectric_loss": lambda f: phys.dielectric_loss(
+                f, 0.01, 3.4, 1.e-4),
+            "spill_eff": lambda f: phys.spill_eff(f, 5.e-3, 2.0, 3.0),
+            "ruze_eff": lambda f: phys.ruze_eff(f, 20.e-6),
+            "ohmic_eff": lambda f: phys.ohmic_eff(f, 36.9e6)}
+        for name, kernel in kernels.items():
+            self._time("Physics.%s" % (name),
+                       lambda: [kernel(ch.freqs) for ch in chs], auto=True)
+        return
+
+    def _time_sky(self, sim, chs):
+        """ Time the sky evaluation of every telescope through an ATM """
+        chs = [ch for ch in chs
+               if ch.cam.tel.param("site").upper() != "SPACE"]
+        if not len(chs):
+            self._skip("Sky.evaluate_elevs", "no ground telescopes")
+            return
+        # PWV [m] and pixel elevations [deg]
+        pwv = 1.e-03
+        elevs = np.linspace(45., 55., self._size["ndet"])
+        self._time("Sky.evaluate_elevs", lambda: [
+            ch.cam.tel.sky.evaluate_elevs("NA", pwv, elevs, ch.freqs)
+            for ch in chs], auto=True)
+        return
+
+    def _time_atm(self, sim, chs):
+        """ Time ATM lookups in a synthetic HDF5 atmosphere file """
+        if self._atm_file is None:
+            for name in ["spectrum", "interpolate"]:
+                self._skip("Atmosphere.%s" % (name), "h5py not installed")
+            return
+        site = "Atacama"
+        rng = np.random.RandomState(self._seed)
+        # (PWV [um], elevation [deg]) of each observation and detector,
+        # rounded to the grid of the ATM file as Sky does
+        nlookup = (self._size["nexp"] * self._size["nobs"] *
+                   self._size["ndet"] * len(chs))
+        pwvs = 100 * np.round(rng.uniform(2., 20., nlookup)).astype(int)
+        elevs = np.round(rng.uniform(30., 70., nlookup)).astype(int)
+        self._time("Atmosphere.spectrum", lambda atm: [
+            atm.spectrum(site, pwvs[i], elevs[i]) for i in range(nlookup)],
+            setup=lambda: at.Atmosphere(sim.log, self._atm_file))
+        # Interpolation reads the grid once, so time it warm
+        atm = at.Atmosphere(sim.log, self._atm_file)
+        elevs = np.linspace(45., 55., self._size["ndet"])
+        with self._quiet():
+            for ch in chs:
+                atm.interpolate(site, 1000., elevs, ch.freqs)
+        self._time("Atmosphere.interpolate", lambda: [
+            atm.interpolate(site, pwv, elevs, ch.freqs)
+            for pwv in pwvs[:self._size["nobs"]] for ch in chs], auto=True)
+        atm.close()
+        return
+
+    def _time_unpack(self):
+        """ Time unpacking the outputs written by the other benchmarks """
+        exp_dir = os.path.abspath(self._exp_dir)
+        self._time("Unpack.unpack_sensitivities",
+                   lambda: up.Unpack().unpack_sensitivities(exp_dir))
+        self._time("Unpack.unpack_optical_powers",
+                   lambda: up.Unpack().unpack_optical_powers(exp_dir))
+        self._time("Unpack.unpack_parameter_vary",
+                   lambda: up.Unpack().unpack_parameter_vary(
+                       exp_dir, "bench"))
+        return
+
+    def _time(self, name, run, setup=None, auto=False):
+        """
+        Time a benchmark 'repeat' times. 'run' is passed the return value
+        of 'setup', which is called before each timing and not timed. When
+        'auto' is set, 'run' is called as many times per timing as take
+        at least self._min_time, and the time per call is reported
+        """
+        number = 1
+        if auto:
+            with self._quiet():
+                start = tm.perf_counter()
+                run()
+                number = max(1, int(np.ceil(self._min_time / max(
+                    tm.perf_counter() - start, 1.e-9))))
+        times = []
+        for r in range(self._repeat):
+            with self._quiet():
+                if setup is None:
+                    start = tm.perf_counter()
+                    for i in range(number):
+                        run()
+                else:
+                    arg = setup()
+                    start = tm.perf_counter()
+                    run(arg)
+                times.append((tm.perf_counter() - start) / number)
+        self.results[name] = {
+            "min": min(times), "median": float(np.median(times)),
+            "number": number, "times": times}
+        print("%-8s %-34s %12.6f %12.6f %8d" % (
+            self._name, name, min(times), np.median(times), number))
+        sy.stdout.flush()
+        return
+
+    def _skip(self, name, reason):
+        """ Record a benchmark that could not run """
+        self.results[name] = {"skipped": reason}
+        print("%-8s %-34s %s" % (self._name, name, "skipped: " + reason))
+        return
+
+    @cl.contextmanager
+    def _quiet(self):
+        """ Silence the status bars and messages printed by BoloCalc """
+        with open(os.devnull, "w") as f, cl.redirect_stdout(f):
+            yield
+
+
+def _atm_file(work_dir):
+    """ Synthetic HDF5 atmosphere file, or None if h5py is not installed """
+    try:
+        import h5py  # noqa: F401
+    except ImportError:
+        return None
+    fname = os.path.join(work_dir, "atm_synth.hdf5")
+    if not os.path.isfile(fname):
+        ge.write_atm_hdf5(fname)
+    return fname
+
+
+if __name__ == "__main__":
+    parser = ap.ArgumentParser(
+        description="Time BoloCalc on synthetic experiments")
+    parser.add_argument("--sizes", nargs="+", default=["small", "medium"],
+                        choices=list(sizes.keys()),
+                        help="Workload sizes to run")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Number of timings of each benchmark")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="Worker processes for simulating and varying")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="Random seed of the generated experiments")
+    parser.add_argument("--work", default=None,
+                        help="Directory for the generated experiments. "
+                        "Defaults to a temporary directory, which is removed")
+    parser.add_argument("--startup-exp", default=None,
+                        help="Also time the setup of this experiment "
+                        "directory, e.g. Experiments/ExampleExperiment/V0")
+    parser.add_argument("--out", default=None,
+                        help="Write the timings to this JSON file")
+    args = parser.parse_args()
+
+    work_dir = args.work
+    if work_dir is None:
+        work_dir = tf.mkdtemp(prefix="bolocalc_bench_")
+    elif not os.path.isdir(work_dir):
+        os.makedirs(work_dir)
+    report = {"date": dt.datetime.now().isoformat(),
+              "python": sy.version.split()[0],
+              "numpy": np.__version__,
+              "platform": pl.platform(),
+              "cpus": os.cpu_count(),
+              "repeat": args.repeat,
+              "jobs": args.jobs,
+              "seed": args.seed,
+              "startup_budget": startup_budget,
+              "sizes": {}}
+    print("%-8s %-34s %12s %12s %8s" % (
+        "size", "benchmark", "min [s]", "median [s]", "number"))
+    try:
+        atm_file = _atm_file(work_dir)
+        for name in args.sizes:
+            bench = Benchmark(name, sizes[name], work_dir, args.repeat,
+                              args.jobs, args.seed, atm_file,
+                              args.startup_exp)
+            report["sizes"][name] = {"size": sizes[name],
+                                     "results": bench.run()}
+    finally:
+        if args.work is None:
+            sh.rmtree(work_dir, ignore_errors=True)
+    if args.out is not None:
+        with open(args.out, "w") as f:
+            js.dump(report, f, indent=2)
+        print("Wrote timings to '%s'" % (args.out))
@@ -0,0 +1,122 @@
+# Built-in modules
+import numpy as np
+import argparse as ap
+import contextlib as cl
+import os
+import shutil as sh
+import sys as sy
+import tempfile as tf
+
+# BoloCalc modules
+sy.path.insert(0, os.path.abspath(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")))
+import src.simulation as sm  # noqa: E402
+import gen_experiment as ge  # noqa: E402
+
+# Checks that the vectorized Sensitivity.ch_sensitivity() agrees with the
+# reference Sensitivity.ch_sensitivity_ref(), which calculates one
+# (observation, detector) pair at a time, for every channel of several
+# experiment realizations. Correlations are on. By default a synthetic
+# experiment from gen_experiment.py is checked, which has a telescope at
+# the custom 'Cust' atmosphere site and one in space. Use '--exp' to
+# check an existing experiment, e.g. the example experiment, or '--sites'
+# to put the synthetic telescopes at sites of the HDF5 atmosphere file.
+# Exits with status 1 if any output differs by more than '--rtol'
+#
+# Example:
+#    $ python auxil/check_sensitivity.py
+#    $ python auxil/check_sensitivity.py \
+#          --exp Experiments/ExampleExperiment/V0/
+
+# Outputs of Sensitivity.ch_sensitivity(), in order
+_outs = [
+    "Eff", "OptPow", "TelTemp", "SkyTemp", "PhNEP", "BoloNEP", "ReadNEP",
+    "DetNEP", "DetNET", "DetNETRJ", "ArrNET", "ArrNETRJ", "CorrFact",
+    "MapDepth", "MapDepthRJ"]
+
+
+def check(exp_dir, work_dir, nexp=2, nobs=3, ndet=4, seed=0):
+    """
+    Compare ch_sensitivity() with ch_sensitivity_ref() for every channel
+    and return the largest relative difference of each output
+
+    Args:
+    exp_dir (str): experiment directory
+    work_dir (str): directory for the simulation inputs and log
+    nexp (int): experiment realizations. Defaults to 2
+    nobs (int): observation realizations. Defaults to 3
+    ndet (int): detector realizations. Defaults to 4
+    seed (int): random seed of the simulation. Defaults to 0
+    """
+    sim_file = os.path.join(work_dir, "simulationInputs.txt")
+    ge.write_sim_file(sim_file, nexp, nobs, ndet, seed=seed, snap=False)
+    with _quiet():
+        sim = sm.Simulation(
+            os.path.join(work_dir, "log.txt"), sim_file, exp_dir)
+    errs = np.zeros(len(_outs))
+    for n in range(nexp):
+        with _quiet():
+            sim.seed_exp(sim.exp, n)
+            sim.exp.evaluate()
+        for tel in sim.exp.tels.values():
+            for cam in tel.cams.values():
+                for ch in cam.chs.values():
+                    vec = sim.sns.ch_sensitivity(ch)
+                    ref = sim.sns.ch_sensitivity_ref(ch)
+                    err = np.max(np.abs(vec - ref) / np.maximum(
+                        np.abs(ref), np.finfo(float).tiny), axis=1)
+                    errs = np.maximum(errs, err)
+                    print("%-6d %-10s %-10s %-10s %.3e" % (
+                        n, tel.name, cam.name, ch.band_id, np.max(err)))
+    return errs
+
+
+# ***** Helper Methods *****
+@cl.contextmanager
+def _quiet():
+    """ Silence the status bars and messages printed by BoloCalc """
+    with open(os.devnull, "w") as f, cl.redirect_stdout(f):
+        yield
+
+
+if __name__ == "__main__":
+    parser = ap.ArgumentParser(
+        description="Check the vectorized channel sensitivity against "
+        "the per-detector reference")
+    parser.add_argument("--exp", default=None,
+                        help="Experiment directory to check. Defaults to a "
+                        "synthetic experiment")
+    parser.add_argument("--sites", nargs="+", default=["Cust", "Space"],
+                        help="Sites of the synthetic telescopes")
+    parser.add_argument("--nexp", type=int, default=2,
+                        help="Experiment realizations")
+    parser.add_argument("--nobs", type=int, default=3,
+                        help="Observation realizations")
+    parser.add_argument("--ndet", type=int, default=4,
+                        help="Detector realizations")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="Random seed")
+    parser.add_argument("--rtol", type=float, default=1.e-10,
+                        help="Largest allowed relative difference")
+    args = parser.parse_args()
+
+    work_dir = tf.mkdtemp(prefix="bolocalc_check_")
+    try:
+        exp_dir = args.exp
+        if exp_dir is None:
+            exp_dir = os.path.join(work_dir, "Experiments", "Check", "V0")
+            ge.generate(exp_dir, ntel=len(args.sites), ncam=2, nch=3,
+                        nopt=8, sites=args.sites, seed=args.seed)
+        print("%-6s %-10s %-10s %-10s %s" % (
+            "real", "telescope", "camera", "band", "max rel diff"))
+        errs = check(os.path.abspath(exp_dir), work_dir, args.nexp,
+                     args.nobs, args.ndet, args.seed)
+    finally:
+        sh.rmtree(work_dir, ignore_errors=True)
+    for name, err in zip(_outs, errs):
+        print("%-12s %.3e" % (name, err))
+    if np.max(errs) > args.rtol:
+        print("FAILED: relative difference %.3e exceeds %.1e" % (
+            np.max(errs), args.rtol))
+        sy.exit(1)
+    print("OK: relative differences are within %.1e" % (args.rtol))
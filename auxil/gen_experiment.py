@@ -0,0 +1,410 @@
+# Built-in modules
+import numpy as np
+import argparse as ap
+import os
+
+# Generates synthetic BoloCalc experiments of configurable size, so that
+# performance can be measured offline on a reproducible workload. Every
+# value is drawn from a random generator seeded by '--seed', so the same
+# arguments always write the same files.
+#
+# Ground telescopes use the 'Cust' site with a synthetic 'atm.txt', and the
+# other telescopes are in space, so no HDF5 atmosphere file is needed.
+# write_atm_hdf5() writes a synthetic HDF5 atmosphere file when one is
+# wanted, e.g. to benchmark the Atmosphere object.
+#
+# Example:
+#    $ python auxil/gen_experiment.py /tmp/Experiments/Synth/V0 --tels 2 \
+#          --cams 3 --chs 4 --optics 10 --sim-file /tmp/simInputs.txt
+
+# Columns of optics.txt and channels.txt
+_opt_cols = [
+    "Element", "Temperature", "Absorption", "Reflection", "Thickness",
+    "Index", "Loss Tangent", "Conductivity", "Surface Rough", "Spillover",
+    "Spillover Temp", "Scatter Frac", "Scatter Temp"]
+_chn_cols = [
+    "Band ID", "Pixel ID", "Band Center", "Fractional BW", "Pixel Size",
+    "Num Det per Wafer", "Num Waf per OT", "Num OT", "Waist Factor",
+    "Det Eff", "Psat", "Psat Factor", "Carrier Index", "Tc", "Tc Fraction",
+    "SQUID NEI", "Bolo Resistance", "Read Noise Frac", "Yield"]
+# Frequencies of the synthetic ATM spectra [GHz]
+_atm_freqs = np.arange(10., 401., 1.)
+
+
+def atm_spectrum(freq, pwv, elev):
+    """
+    Synthetic ATM (optical depth, temperature, transmission) spectra, with
+    a water line near 183 GHz and an oxygen line near 119 GHz
+
+    Args:
+    freq (array): frequencies [GHz]
+    pwv (float): PWV [mm]
+    elev (float): elevation [deg]
+    """
+    lines = (0.5 * pwv * np.exp(-0.5 * ((freq - 183.3) / 4.) ** 2) +
+             0.3 * np.exp(-0.5 * ((freq - 118.8) / 2.) ** 2))
+    depth = ((0.01 + 0.04 * pwv) * (1. + (freq / 250.) ** 2) + lines) / (
+        np.sin(np.radians(elev)))
+    tran = np.exp(-depth)
+    temp = 270. * (1. - tran)
+    return depth, temp, tran
+
+
+def generate(exp_dir, ntel=1, ncam=2, nch=2, nopt=6,
+             sites=("Cust", "Space"), seed=0):
+    """
+    Write a synthetic experiment directory
+
+    Each camera has per-band optic parameters, optic band files, detector
+    band files, PDF distributions, and a pixel elevation distribution.
+    Telescopes are named 'Tel1', 'Tel2', ..., cameras 'Cam1', 'Cam2', ...,
+    and channels have band IDs 1, 2, ...
+
+    Args:
+    exp_dir (str): experiment directory to write
+    ntel (int): number of telescopes. Defaults to 1
+    ncam (int): number of cameras per telescope. Defaults to 2
+    nch (int): number of channels per camera. Defaults to 2
+    nopt (int): number of optics per optical chain, at least 4.
+    Defaults to 6
+    sites (list): telescope sites, cycled over the telescopes, each
+    'Cust', 'Space', or a site of the HDF5 atmosphere file.
+    Defaults to ('Cust', 'Space')
+    seed (int): random seed. Defaults to 0
+    """
+    if nopt < 4:
+        raise ValueError("At least 4 optics are needed, got %d" % (nopt))
+    rng = np.random.RandomState(seed)
+    _write(os.path.join(exp_dir, "config", "foregrounds.txt"), _table([
+        ["Dust Temperature", "K", "19.7"],
+        ["Dust Spec Index", "NA", "1.5"],
+        ["Dust Amplitude", "MJy", "1.2e-2"],
+        ["Dust Scale Frequency", "GHz", "353.0"],
+        ["Synchrotron Spec Index", "NA", "-3.0"],
+        ["Synchrotron Amplitude", "K", "2.0e-4"],
+        ["Sync Scale Frequency", "GHz", "30.0"]]))
+    for t in range(ntel):
+        tel_dir = os.path.join(exp_dir, "Tel%d" % (t + 1))
+        _gen_telescope(tel_dir, sites[t % len(sites)], rng)
+        for c in range(ncam):
+            cam_dir = os.path.join(tel_dir, "Cam%d" % (c + 1))
+            _gen_camera(cam_dir, nch, nopt, rng)
+    return
+
+
+def write_sim_file(fname, nexp=10, nobs=10, ndet=10, fres=1.0,
+                   infg=False, seed=0, snap=True):
+    """
+    Write a simulation input file
+
+    Args:
+    fname (str): file name
+    nexp (int): experiment realizations. Defaults to 10
+    nobs (int): observation realizations. Defaults to 10
+    ndet (int): detector realizations. Defaults to 10
+    fres (float): frequency resolution [GHz]. Defaults to 1.0
+    infg (bool): include foregrounds. Defaults to False
+    seed (int): random seed of the simulation. Defaults to 0
+    snap (bool): cache parsed cameras. Defaults to True
+    """
+    rows = [
+        ["Experiments", nexp], ["Observations", nobs],
+        ["Detectors", ndet], ["Resolution", "%.3f" % (fres)],
+        ["Foregrounds", infg], ["Correlations", True],
+        ["Percentile Lo", 15.9], ["Percentile Hi", 84.1],
+        ["Interpolate ATM", False], ["Seed", seed],
+        ["Stream Outputs", False], ["Quantile Error", 0.01],
+        ["Results File", "NA"], ["Snapshot Cache", snap]]
+    _write(fname, "Parameter | Value | Description\n" + "".join(
+        ["%s | %s | x\n" % (name, str(val)) for name, val in rows]))
+    return
+
+
+def write_vary_file(fname, nstep=5, sweep=False):
+    """
+    Write a parameter vary file for an experiment written by generate(),
+    varying a detector, a telescope, and an optic parameter of the first
+    camera of the first telescope
+
+    Args:
+    fname (str): file name
+    nstep (int): number of values of each parameter. Defaults to 5
+    sweep (bool): only vary the SQUID NEI of the first channel, which
+    is swept as an array axis. Defaults to False
+    """
+    if sweep:
+        params = [["Tel1", "Cam1", "1", "", "SQUID NEI", 2., 10.]]
+    else:
+        params = [
+            ["Tel1", "Cam1", "1", "", "Psat", 5., 15.],
+            ["Tel1", "Cam1", "1", "", "Det Eff", 0.5, 0.9],
+            ["Tel1", "", "", "", "Observation Time", 1., 5.],
+            ["Tel1", "Cam1", "", "Lens1", "Temperature", 2., 10.]]
+    lines = ["Telescope | Camera | Channel | Optic | Parameter | Minimum | "
+             "Maximum | Step Size\n"]
+    for tel, cam, ch, opt, param, lo, hi in params:
+        step = (hi - lo) / max(nstep - 1, 1)
+        # Vary uses np.arange(min, max + step, step), which may overshoot
+        # by one value due to rounding, so that parameters varied together
+        # would have different numbers of values
+        if len(np.arange(lo, hi + step, step)) > nstep:
+            hi -= 1.e-06 * step
+        lines.append("%s | %s | %s | %s | %s | %s | %s | %s\n" % (
+            tel, cam, ch, opt, param, repr(lo), repr(hi), repr(step)))
+    _write(fname, "".join(lines))
+    return
+
+
+def write_atm_hdf5(fname, sites=("Atacama",), pwvs=None, elevs=None):
+    """
+    Write a synthetic HDF5 atmosphere file in the layout of the BoloCalc
+    atmosphere file, with one '<pwv [um]>,<elev [deg]>' dataset of
+    (frequency, optical depth, temperature, transmission) per grid point
+
+    Args:
+    fname (str): file name
+    sites (list): site names. Defaults to ('Atacama',)
+    pwvs (list): PWVs [um]. Defaults to 0 to 4 mm in 0.1 mm steps
+    elevs (list): elevations [deg]. Defaults to 20 to 90 deg in 1 deg steps
+    """
+    import h5py as hp
+    if pwvs is None:
+        pwvs = range(0, 4001, 100)
+    if elevs is None:
+        elevs = range(20, 91)
+    with hp.File(fname, "w") as hf:
+        for site in sites:
+            grp = hf.create_group(site)
+            for pwv in pwvs:
+                for elev in elevs:
+                    grp.create_dataset("%d,%d" % (pwv, elev), data=(
+                        _atm_freqs,) + atm_spectrum(
+                            _atm_freqs, pwv * 1.e-03, elev))
+    return
+
+
+# ***** Helper Methods *****
+def _gen_telescope(tel_dir, site, rng):
+    """ Write telescope.txt, its PDFs, and a custom ATM if needed """
+    config_dir = os.path.join(tel_dir, "config")
+    rows = [
+        ["Site", "NA", site],
+        ["Elevation", "deg", "%.1f +/- 3.0" % (rng.uniform(40., 60.))],
+        ["PWV", "mm", "%.2f +/- 0.2" % (rng.uniform(0.5, 1.5))],
+        ["Observation Time", "yr", "%.1f" % (rng.uniform(2., 6.))],
+        ["Sky Fraction", "NA", "%.2f" % (rng.uniform(0.05, 0.7))],
+        ["Observation Efficiency", "NA", "PDF"],
+        ["NET Margin", "NA", "1.0"]]
+    _write(os.path.join(config_dir, "telescope.txt"), _table(rows))
+    _write_pdf(os.path.join(config_dir, "Dist", "ObservationEfficiency.txt"),
+               rng.uniform(0.15, 0.25), 0.02, rng)
+    if site.upper() == "CUST":
+        depth, temp, tran = atm_spectrum(
+            _atm_freqs, rng.uniform(0.5, 1.5), rng.uniform(40., 60.))
+        _savetxt(os.path.join(config_dir, "atm.txt"),
+                 np.transpose([_atm_freqs, depth, temp, tran]))
+    return
+
+
+def _gen_camera(cam_dir, nch, nopt, rng):
+    """ Write a camera config directory """
+    config_dir = os.path.join(cam_dir, "config")
+    cam_name = os.path.split(cam_dir.rstrip(os.sep))[-1]
+    fnum = rng.uniform(1.5, 2.5)
+    _write(os.path.join(config_dir, "camera.txt"), _table([
+        ["Boresight Elevation", "deg", "0.0"],
+        ["Optical Coupling", "NA", "1.0"],
+        ["F Number", "NA", "%.2f" % (fnum)],
+        ["Bath Temp", "K", "PDF"]]))
+    _write_pdf(os.path.join(config_dir, "Dist", "BathTemp.txt"),
+               0.1, 0.005, rng)
+    # Pixel elevation offsets from the boresight [deg] and their fractions
+    offs = np.linspace(-10., 10., 11)
+    frac = np.exp(-0.5 * (offs / 5.) ** 2)
+    _savetxt(os.path.join(config_dir, "elevation.txt"),
+             np.transpose([offs, frac / np.sum(frac)]), fmt="%.4f")
+    # Band centers [GHz] spread over the camera's frequency range
+    lo = rng.uniform(25., 60.)
+    bcs = lo * np.power(rng.uniform(3., 6.), np.linspace(0., 1., nch))
+    fbws = rng.uniform(0.2, 0.35, nch)
+    rows = []
+    for i in range(nch):
+        rows.append(_gen_channel(
+            config_dir, cam_name, i + 1, bcs[i], fbws[i], fnum,
+            i == nch - 1 and nch > 1, rng))
+    _write(os.path.join(config_dir, "channels.txt"),
+           _grid(_chn_cols, rows))
+    _write(os.path.join(config_dir, "optics.txt"), _grid(
+        _opt_cols, _gen_optics(config_dir, nch, nopt, bcs, rng)))
+    return
+
+
+def _gen_channel(config_dir, cam_name, band_id, bc, fbw, fnum, use_band,
+                 rng):
+    """ Channel row, writing its band file and PDFs """
+    psat = "NA"
+    psat_fact = "%.1f" % (rng.uniform(2., 3.))
+    # The first channel samples its Psat from a PDF
+    if band_id == 1:
+        psat = "PDF"
+        psat_fact = "NA"
+        _write_pdf(os.path.join(
+            config_dir, "Dist", "Detectors", "PSAT_%d.txt" % (band_id)),
+            rng.uniform(5., 15.), 1., rng)
+    elif band_id % 2:
+        psat = "%.2f +/- %.2f" % (rng.uniform(20., 40.), rng.uniform(0.5, 2.))
+        psat_fact = "NA"
+    # The last channel is defined by a measured band
+    bc_str = "%.1f +/- %.1f" % (bc, 0.01 * bc)
+    fbw_str = "%.3f" % (fbw)
+    if use_band:
+        freq = np.arange(bc * (1. - fbw), bc * (1. + fbw), 0.25)
+        edge = 0.5 * fbw * bc
+        tran = 0.9 / (1. + np.power((freq - bc) / edge, 12))
+        err = np.full(len(freq), 0.01)
+        _savetxt(os.path.join(
+            config_dir, "Bands", "Detectors", "%s_%d.txt" % (
+                cam_name, band_id)), np.transpose([freq, tran, err]))
+        bc_str = "BAND"
+        fbw_str = "NA"
+    return [
+        str(band_id), "1", bc_str, fbw_str,
+        # Pixels of 1.2 to 2 F lambda [mm]
+        "%.2f" % (rng.uniform(1.2, 2.) * fnum * 300. / bc),
+        "%d" % (rng.randint(200, 1000)),
+        "%d" % (rng.randint(1, 7)), "1", "3.0",
+        "%.2f +/- 0.05" % (rng.uniform(0.6, 0.8)), psat, psat_fact, "3.0",
+        "0.17", "NA", "%.1f" % (rng.uniform(3., 6.)), "1.0", "0.1",
+        "%.2f" % (rng.uniform(0.7, 0.9))]
+
+
+def _gen_optics(config_dir, nch, nopt, bcs, rng):
+    """ Optics rows from the sky to the detectors, writing band files """
+    names = ["Primary", "Window"]
+    nlens = 0
+    nfilt = 0
+    for i in range(nopt - 4):
+        if i % 2:
+            nlens += 1
+            names.append("Lens%d" % (nlens))
+        else:
+            nfilt += 1
+            names.append("Filter%d" % (nfilt))
+    # Cold stop halfway through the cold optics
+    names.insert(2 + (nopt - 4) // 2, "Lyot")
+    # Last optic is always a lens, such that 'Lens1' exists
+    names.append("Lens%d" % (nlens + 1))
+    # Warm mirror and window, then colder stages down to the focal plane
+    temps = np.concatenate(([280., 290.], np.geomspace(40., 0.1, nopt - 2)))
+    rows = []
+    for i, name in enumerate(names):
+        temp = "%.2f" % (temps[i])
+        row = [name, temp] + ["NA"] * (len(_opt_cols) - 2)
+        if name == "Primary":
+            row[6:11] = ["NA", "36.9", "20.0", _band_list(
+                rng.uniform(0.005, 0.02, nch)), temp]
+            row[3] = "BAND"
+            freq = np.arange(1., 2. * np.amax(bcs), 0.5)
+            _savetxt(os.path.join(
+                config_dir, "Bands", "Optics", "Primary_Reflection.txt"),
+                np.transpose([freq, 1.e-3 * (1. + np.sin(freq / 20.))]))
+        elif name == "Lyot":
+            row[9:11] = ["NA", temp]
+        elif name == "Window" or name.startswith("Lens"):
+            row[3:7] = ["0.01", "%.1f" % (rng.uniform(2., 30.)),
+                        "%.2f" % (rng.uniform(1.5, 3.4)), "PDF"]
+            row[11:] = ["0.01", temp]
+            _write_pdf(os.path.join(
+                config_dir, "Dist", "Optics",
+                "%s_LossTangent.txt" % (name)),
+                rng.uniform(1.e-4, 5.e-4), 5.e-5, rng, fmt="%.4e")
+        else:
+            row[2:4] = [_band_list(rng.uniform(0.005, 0.02, nch)) +
+                        " +/- " + _band_list(np.full(nch, 0.001)), "0.02"]
+        rows.append(row)
+    return rows
+
+
+def _write_pdf(fname, mean, std, rng, fmt="%.5f"):
+    """ Write a sampled (value, probability) distribution """
+    vals = np.linspace(mean - 3. * std, mean + 3. * std, 61)
+    prob = np.exp(-0.5 * ((vals - mean) / std) ** 2)
+    prob *= rng.uniform(0.8, 1.2, len(prob))
+    _savetxt(fname, np.transpose([vals, prob / np.sum(prob)]), fmt=fmt)
+    return
+
+
+def _band_list(vals):
+    """ Per-band value string, e.g. '[0.01, 0.02]' """
+    return "[%s]" % (", ".join(["%.4f" % (v) for v in vals]))
+
+
+def _table(rows):
+    """ 'Name | Unit | Value | Description' lines """
+    return "".join(["%s | x\n" % (" | ".join(row)) for row in rows])
+
+
+def _grid(cols, rows):
+    """ Header and rows of a '|'-separated table """
+    return "".join(["%s\n" % (" | ".join(row)) for row in [cols] + rows])
+
+
+def _makedirs(fname):
+    """ Create the parent directory of a file """
+    dname = os.path.dirname(fname)
+    if dname and not os.path.isdir(dname):
+        os.makedirs(dname)
+    return
+
+
+def _savetxt(fname, arr, **kwargs):
+    """ Write an array with np.savetxt, creating its directory """
+    _makedirs(fname)
+    np.savetxt(fname, arr, **kwargs)
+    return
+
+
+def _write(fname, text):
+    """ Write a text file, creating its directory """
+    _makedirs(fname)
+    with open(fname, "w") as f:
+        f.write(text)
+    return
+
+
+if __name__ == "__main__":
+    parser = ap.ArgumentParser(
+        description="Write a synthetic BoloCalc experiment")
+    parser.add_argument("exp_dir", help="Experiment directory to write")
+    parser.add_argument("--tels", type=int, default=1,
+                        help="Number of telescopes")
+    parser.add_argument("--cams", type=int, default=2,
+                        help="Number of cameras per telescope")
+    parser.add_argument("--chs", type=int, default=2,
+                        help="Number of channels per camera")
+    parser.add_argument("--optics", type=int, default=6,
+                        help="Number of optics per camera")
+    parser.add_argument("--sites", nargs="+", default=["Cust", "Space"],
+                        help="Telescope sites, cycled over the telescopes")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="Random seed of the generated values")
+    parser.add_argument("--sim-file", default=None,
+                        help="Also write a simulation input file")
+    parser.add_argument("--vary-file", default=None,
+                        help="Also write a parameter vary file")
+    parser.add_argument("--nexp", type=int, default=10,
+                        help="Experiment realizations in the sim file")
+    parser.add_argument("--nobs", type=int, default=10,
+                        help="Observation realizations in the sim file")
+    parser.add_argument("--ndet", type=int, default=10,
+                        help="Detector realizations in the sim file")
+    parser.add_argument("--res", type=float, default=1.0,
+                        help="Frequency resolution [GHz] in the sim file")
+    args = parser.parse_args()
+    generate(args.exp_dir, args.tels, args.cams, args.chs, args.optics,
+             args.sites, args.seed)
+    if args.sim_file is not None:
+        write_sim_file(args.sim_file, args.nexp, args.nobs, args.ndet,
+                       args.res, seed=args.seed)
+    if args.vary_file is not None:
+        write_vary_file(args.vary_file)
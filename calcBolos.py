@@ -12,9 +12,6 @@ import argparse as ap  # noqa: E42
 import datetime as dt  # noqa: E42
 import os  # noqa: E42
 
-# BoloCalc modules
-import src.simulation as sm  # noqa: E42
-
 
 def date_time_str():
     now = dt.datetime.now()
@@ -52,6 +49,26 @@ ps.add_argument(
     "--log_name", dest="log_name", nargs=1, type=str,
     default=[dt_str],
     help="Custom name for logging file")
+ps.add_argument(
+    "--jobs", dest="jobs", nargs=1, type=int,
+    default=[1],
+    help="Number of processes over which to spread experiment realizations, "
+         "or realizations and parameter sets when varying parameters")
+ps.add_argument(
+    "--shard", dest="shard", nargs=1, type=str,
+    default=[None], metavar="i/N",
+    help="Only simulate experiment realizations i, i+N, ... and save them "
+         "to a shard file in the experiment directory")
+ps.add_argument(
+    "--merge", action="store_true", dest="merge", default=False,
+    help="Merge the shard files in the experiment directory and "
+         "write the outputs")
+ps.add_argument(
+    "--timing-report", dest="timing_report", nargs=1, type=str,
+    default=[None], metavar="run.json",
+    help="Write the wall time, CPU time, call count, and realizations per "
+         "second of each phase of the run, per telescope, camera, and "
+         "channel, to a JSON file")
 args = ps.parse_args()
 
 # Simulation file
@@ -61,9 +78,35 @@ vary_file = os.path.join(this_path, 'config', 'paramsToVary.txt')
 # Logging file
 log_file = os.path.join(this_path, 'log', ('log_%s.txt' % (args.log_name[0])))
 
+# Shard to simulate
+if args.shard[0] is not None:
+    try:
+        shard = tuple(int(x) for x in args.shard[0].split("/"))
+        if len(shard) != 2:
+            raise ValueError
+    except ValueError:
+        ps.error("--shard must be of the form i/N, e.g. 0/8")
+else:
+    shard = None
+
+# BoloCalc modules, imported after the arguments are parsed so that
+# '--help' and argument errors return without loading numpy and friends
+import src.simulation as sm  # noqa: E42
+
 # Simulate experiment
 sim = sm.Simulation(log_file, sim_file, args.exp_dir)
-if not args.vary:
-    sim.simulate()
+if args.merge:
+    sim.merge_shards()
+elif not args.vary:
+    sim.simulate(jobs=args.jobs[0], shard=shard)
 else:
-    sim.vary_simulate(vary_file, args.vary_name[0], args.vary_tog)
+    sim.vary_simulate(
+        vary_file, args.vary_name[0], args.vary_tog, jobs=args.jobs[0])
+# Write timing report
+if args.timing_report[0] is not None:
+    sim.timer.report(args.timing_report[0], {
+        "experiment": args.exp_dir,
+        "mode": ("merge" if args.merge else
+                 "vary" if args.vary else "simulate"),
+        "jobs": args.jobs[0],
+        "shard": args.shard[0]})
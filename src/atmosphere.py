@@ -0,0 +1,246 @@
+# Built-in modules
+import numpy as np
+import collections as cl
+import os
+
+
+class Atmosphere:
+    """
+    Atmosphere object serves ATM spectra from the HDF5 atmosphere file.
+    The file is opened once per process, and recently used spectra are
+    kept in a least-recently-used cache. h5py is only imported when the
+    file is first opened
+
+    Args:
+    log (src.Log): Log object
+    atm_file (str): HDF5 atmosphere file. Defaults to None, in which case
+    it must be set with set_file() before spectra are served
+    max_size (int): maximum number of cached spectra. Defaults to 1024
+
+    Attributes:
+    hits (int): number of spectra served from the cache
+    misses (int): number of spectra read from the HDF5 file
+
+    The full (PWV, elevation, frequency) grid of a site can also be loaded
+    into memory for interpolate(). The grid is cached as .npy files in a
+    directory next to the HDF5 file, which are memory-mapped on later runs
+    """
+    def __init__(self, log, atm_file=None, max_size=1024):
+        # Store passed parameters
+        self._log = log
+        self._max_size = max_size
+
+        # HDF5 file handle and the process that opened it
+        self._hf = None
+        self._pid = None
+        # Spectra keyed by (site, pwv, elev)
+        self._cache = cl.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        # Full grids keyed by site, and grids resampled to channel
+        # frequencies keyed by (site, freqs)
+        self._cubes = {}
+        self._freq_cubes = {}
+        self.set_file(atm_file)
+
+    def __getstate__(self):
+        """ Open HDF5 file handles cannot be copied or pickled """
+        state = self.__dict__.copy()
+        state["_hf"] = None
+        state["_pid"] = None
+        return state
+
+    # ***** Public Methods *****
+    def set_file(self, atm_file):
+        """
+        Set the HDF5 atmosphere file
+
+        Args:
+        atm_file (str): HDF5 atmosphere file
+        """
+        self.close()
+        self._atm_file = atm_file
+        self._cube_dir = None
+        if atm_file is not None:
+            self._cube_dir = "%s_cache" % (os.path.splitext(atm_file)[0])
+        return
+
+    def spectrum(self, site, pwv, elev):
+        """
+        Retrieve the ATM spectrum for a site, PWV, and elevation
+
+        Args:
+        site (str): site name, as labeled in the HDF5 file
+        pwv (int): PWV [um]
+        elev (int): elevation [deg]
+        """
+        key = (site, pwv, elev)
+        if key in self._cache:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return self._cache[key]
+        self.misses += 1
+        data = self._file()[site]["%d,%d" % (pwv, elev)][()]
+        # data[1] is not used
+        ret = (data[0], data[3], data[2])
+        for arr in ret:
+            arr.setflags(write=False)
+        self._cache[key] = ret
+        if len(self._cache) > self._max_size:
+            self._cache.popitem(last=False)
+        return ret
+
+    def interpolate(self, site, pwv, elevs, freqs):
+        """
+        ATM transmission and temperature spectra at the passed frequencies
+        for one PWV and several elevations, bilinearly interpolated over
+        the PWV and elevation grid of the HDF5 file
+
+        Args:
+        site (str): site name, as labeled in the HDF5 file
+        pwv (float): PWV [um]
+        elevs (list): elevations [deg]
+        freqs (list): frequencies [Hz]
+        """
+        pwvs, elev_grid, tran, temp = self._freq_cube(site, freqs)
+        ip, wp = self._interp_wts(pwvs, np.array([pwv]))
+        ie, we = self._interp_wts(elev_grid, np.array(elevs))
+        wp = wp[0]
+        ip = ip[0]
+        we = we[:, np.newaxis]
+        ret = []
+        for cube in [tran, temp]:
+            lo = (1. - we) * cube[ip - 1, ie - 1] + we * cube[ip - 1, ie]
+            hi = (1. - we) * cube[ip, ie - 1] + we * cube[ip, ie]
+            ret.append((1. - wp) * lo + wp * hi)
+        return ret
+
+    def log_stats(self):
+        """ Write cache hit/miss statistics to the log """
+        tot = self.hits + self.misses
+        if tot == 0:
+            return
+        self._log.log(
+            "ATM spectrum cache: %d hits, %d misses (%.1f%% hit rate), "
+            "%d of %d spectra cached"
+            % (self.hits, self.misses, 100. * self.hits / float(tot),
+               len(self._cache), self._max_size))
+        return
+
+    def close(self):
+        """ Close the HDF5 file """
+        if self._hf is not None and self._pid == os.getpid():
+            self._hf.close()
+        self._hf = None
+        self._pid = None
+        return
+
+    # ***** Helper Methods *****
+    def _file(self):
+        """ HDF5 file handle, reopened in forked processes """
+        if self._hf is None or self._pid != os.getpid():
+            try:
+                import h5py as hp
+            except ImportError:
+                self._log.err(
+                    "h5py not installed. As of BoloCalc v0.10.0, h5py is "
+                    "used to load ATM profiles. Use pip to install via "
+                    "'pip install h5py', or, if using an Anaconda "
+                    "environment, 'conda install h5py'")
+            self._hf = hp.File(self._path(), "r")
+            self._pid = os.getpid()
+        return self._hf
+
+    def _path(self):
+        """ HDF5 atmosphere file, which must have been set """
+        if self._atm_file is None:
+            self._log.err(
+                "No ATM file was located, as no telescope was configured "
+                "to observe through the atmosphere at startup")
+        return self._atm_file
+
+    def _hdf5_cube(self, site):
+        """ Full (PWV, elevation, frequency) grid for a site """
+        if site in self._cubes:
+            return self._cubes[site]
+        self._path()
+        files = {k: os.path.join(self._cube_dir, "%s_%s.npy" % (site, k))
+                 for k in ["pwv", "elev", "freq", "tran", "temp"]}
+        if all([os.path.exists(fname) and
+                os.path.getmtime(fname) >= os.path.getmtime(self._atm_file)
+                for fname in files.values()]):
+            self._log.log(
+                "Memory-mapping ATM grid for site '%s' from %s"
+                % (site, self._cube_dir))
+            cube = [np.load(files[k], mmap_mode="r")
+                    for k in ["pwv", "elev", "freq", "tran", "temp"]]
+        else:
+            self._log.log(
+                "Loading ATM grid for site '%s' from %s"
+                % (site, self._atm_file))
+            cube = self._read_cube(site)
+            try:
+                if not os.path.isdir(self._cube_dir):
+                    os.makedirs(self._cube_dir)
+                for k, arr in zip(
+                   ["pwv", "elev", "freq", "tran", "temp"], cube):
+                    np.save(files[k], arr)
+            except OSError:
+                self._log.log(
+                    "Could not write ATM grid cache to %s"
+                    % (self._cube_dir))
+        self._cubes[site] = cube
+        return cube
+
+    def _read_cube(self, site):
+        """ Read every PWV and elevation spectrum for a site """
+        grp = self._file()[site]
+        keys = [tuple(int(x) for x in key.split(",")) for key in grp.keys()]
+        pwvs = np.unique([key[0] for key in keys])
+        elevs = np.unique([key[1] for key in keys])
+        if len(keys) != len(pwvs) * len(elevs):
+            self._log.err(
+                "ATM spectra for site '%s' in %s do not form a complete "
+                "PWV and elevation grid" % (site, self._atm_file))
+        freq = None
+        tran = None
+        temp = None
+        for i, pwv in enumerate(pwvs):
+            for j, elev in enumerate(elevs):
+                data = grp["%d,%d" % (pwv, elev)][()]
+                if freq is None:
+                    freq = data[0]
+                    tran = np.zeros((len(pwvs), len(elevs), len(freq)))
+                    temp = np.zeros((len(pwvs), len(elevs), len(freq)))
+                elif not np.array_equal(freq, data[0]):
+                    self._log.err(
+                        "ATM spectra for site '%s' in %s are not defined "
+                        "on a common frequency grid"
+                        % (site, self._atm_file))
+                tran[i, j] = data[3]
+                temp[i, j] = data[2]
+        return [pwvs.astype(np.float), elevs.astype(np.float),
+                freq, tran, temp]
+
+    def _freq_cube(self, site, freqs):
+        """ Site grid linearly interpolated to channel frequencies [Hz] """
+        GHz_to_Hz = 1.e+09
+        freqs = np.array(freqs)
+        key = (site, len(freqs), freqs[0], freqs[-1])
+        if key not in self._freq_cubes:
+            pwvs, elevs, freq, tran, temp = self._hdf5_cube(site)
+            ind, wt = self._interp_wts(freq * GHz_to_Hz, freqs)
+            self._freq_cubes[key] = (
+                pwvs, elevs,
+                (1. - wt) * tran[..., ind - 1] + wt * tran[..., ind],
+                (1. - wt) * temp[..., ind - 1] + wt * temp[..., ind])
+        return self._freq_cubes[key]
+
+    def _interp_wts(self, grid, vals):
+        """
+        Upper grid indices and weights for linearly interpolating
+        at 'vals', holding the end values beyond the grid as np.interp does
+        """
+        ind = np.clip(np.searchsorted(grid, vals), 1, len(grid) - 1)
+        wt = (vals - grid[ind - 1]) / (grid[ind] - grid[ind - 1])
+        return ind, np.clip(wt, 0., 1.)
@@ -48,23 +48,27 @@ class Band:
         ret_arr = self._check_range(ret_arr)
         return ret_arr
 
-    def sample(self, nsample=1):
+    def sample(self, nsample=1, rng=None):
         """
         Return a sampled spectrum given its errors
 
         Args:
         nsample (int): number of sample lists to return
+        rng (np.random.Generator): random generator to sample with.
+        Defaults to None, which uses the global numpy random state
         """
+        if rng is None:
+            rng = np.random
         # Return the average if no errors are defined
         if self._err is None:
             return self.get_avg(nsample)
         # Otherwise, sample assuming data at each frequency is Gaussian
         else:
             if nsample == 1:
-                ret_arr = np.array([np.random.normal(self._band, self._err)])
+                ret_arr = np.array([rng.normal(self._band, self._err)])
             else:
-                ret_arr = np.random.normal(self._band, self._err,
-                                           (nsample, len(self._band)))
+                ret_arr = rng.normal(self._band, self._err,
+                                     (nsample, len(self._band)))
         ret_arr = self._check_range(ret_arr)
         return ret_arr
 
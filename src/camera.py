@@ -22,6 +22,8 @@ class Camera:
     dir (str): where arg 'inp_dir' is stored
     config_dir (str): configuration directory for this camera
     name (str): camera name
+    rng (np.random.Generator): random generator for parameter sampling.
+    Defaults to None, which uses the global numpy random state
 
     Parents:
     tel (src.Telescope): Telescope object
@@ -39,6 +41,8 @@ class Camera:
         self._load = self.tel.exp.sim.load
         self._std_params = self.tel.exp.sim.std_params
         self._nexp = self.tel.exp.sim.param("nexp")
+        self._tim = self.tel.exp.sim.timer
+        self.rng = None
 
         self._log.log("Generating camera realization from %s" % (self.dir))
         # Check whether camera and config dir exists
@@ -58,13 +62,27 @@ class Camera:
         """ Evaluate camera """
         self._log.log("Evaluating camera %s" % (self.dir))
         # Evaluate camera parameters
-        self._store_param_vals()
+        with self._tim.time("sample", self.tel.name, self.name):
+            self._store_param_vals()
         # Evaluate channels
         self._log.log("Evaluating channels in camera %s" % (self.dir))
         for chan in self.chs.values():
             chan.evaluate()
         return
 
+    def set_seed(self, seed_seq):
+        """
+        Give this camera and its children independent random generators
+
+        Args:
+        seed_seq (np.random.SeedSequence): seed sequence for this camera
+        """
+        self.rng = np.random.default_rng(seed_seq)
+        seqs = seed_seq.spawn(len(self.chs))
+        for chan, seq in zip(self.chs.values(), seqs):
+            chan.set_seed(seq)
+        return
+
     def param(self, param):
         """
         Return camera parameter value
@@ -74,6 +92,19 @@ class Camera:
         """
         return self._param_vals[param]
 
+    def resample(self, param):
+        """
+        Re-sample one camera parameter, leaving the other parameters
+        and the channels as they are
+
+        Args:
+        param (str): name of parameter or param dict key
+        """
+        if param not in self._param_dict.keys():
+            param = self._param_names[param.replace(" ", "").strip().upper()]
+        self._param_vals[param] = self._param_samp(self._param_dict[param])
+        return
+
     def change_param(self, param, new_val):
         """
         Change camera parameter values
@@ -244,4 +275,4 @@ class Camera:
         if self._nexp == 1:
             return param.get_med()
         else:
-            return param.sample(nsample=1)
+            return param.sample(nsample=1, rng=self.rng)
@@ -24,10 +24,19 @@ class Channel:
     band_mask (list): frequencies for which the band is defined
     elev_dict (dict): pixel elevation distribution for ObservationSet object
     det_dict (dict): detector-specific parameters for DetectorArray object
-    elem (list): sky, optics, and detector element names
-    emis (list): sky, optics, and detector element absorbtivities
-    tran (list): sky, optics, and detector element transmissions
-    temp (list): sky, optics, and detector element temperatures
+    elem (list): sky, optics, and detector element names, one per element
+    emis (array): sky, optics, and detector element absorbtivities
+    with shape (nobs, ndet, nelem, nfreq), concatenated from segments()
+    tran (array): sky, optics, and detector element transmissions
+    temp (array): sky, optics, and detector element temperatures
+    rng (np.random.Generator): random generator for sampling the channel,
+    its observations, and its optics. Defaults to None, which uses the
+    global numpy random state
+    cmb_facts (tuple): cached CMB dP/dT kernel and Trj/Tcmb factor for
+    the channel frequencies. Reset to None when the band is re-stored
+    sens_cache (dict): intermediate arrays of the latest sensitivity
+    calculation, stored by src.Sensitivity. Reset to None when the
+    channel is evaluated
 
     Parents:
     cam (src.Camera): Camera object
@@ -50,6 +59,9 @@ class Channel:
         self._nexp = self.cam.tel.exp.sim.param("nexp")
         self._fres = self.cam.tel.exp.sim.param("fres")
         self._ndet = self.cam.tel.exp.sim.param("ndet")
+        self._tim = self.cam.tel.exp.sim.timer
+        self.rng = None
+        self.sens_cache = None
 
         self._log.log("Generating realization for channel Band_ID '%s'"
                       % (self.band_id))
@@ -73,14 +85,63 @@ class Channel:
     def evaluate(self):
         """ Evaluate channel """
         self._log.log("Evaluating channel Band_ID '%s'" % (self.band_id))
-        # Generate parameter values
-        self._store_param_vals()
-        # Evaluate focal plane
-        self.det_arr.evaluate()
-        # Evaluate observations
-        self._obs_set.evaluate()
-        # Build the elem, emis, tran, and temp arrays
-        self._calculate()
+        path = (self.cam.tel.name, self.cam.name, self.band_id)
+        with self._tim.time("sample", *path):
+            # Generate parameter values
+            self._store_param_vals()
+            # Evaluate focal plane
+            self.det_arr.evaluate()
+        with self._tim.time("sky", *path):
+            # Evaluate observations
+            self._obs_set.evaluate()
+        with self._tim.time("optics", *path):
+            # Build the elem, emis, tran, and temp arrays
+            self._calculate()
+        # Sensitivity intermediates are stale
+        self.sens_cache = None
+
+    def segments(self, quant):
+        """
+        Sky, optics, and detector segments of the element arrays, as
+        views that broadcast to shape (nobs, ndet, nseg, nfreq)
+        without copying
+
+        Args:
+        quant (str): 'emis', 'tran', or 'temp'
+        """
+        sky, opt, det = self._segs[quant]
+        shape = sky.shape[:2]
+        return [sky,
+                np.broadcast_to(opt, shape + opt.shape),
+                np.broadcast_to(det, shape + det.shape[1:])]
+
+    @property
+    def emis(self):
+        """ Sky, optics, and detector element absorbtivities """
+        return self._concat("emis")
+
+    @property
+    def tran(self):
+        """ Sky, optics, and detector element transmissions """
+        return self._concat("tran")
+
+    @property
+    def temp(self):
+        """ Sky, optics, and detector element temperatures """
+        return self._concat("temp")
+
+    def set_seed(self, seed_seq):
+        """
+        Give this channel and its children independent random generators
+
+        Args:
+        seed_seq (np.random.SeedSequence): seed sequence for this channel
+        """
+        self.rng = np.random.default_rng(seed_seq)
+        seqs = seed_seq.spawn(len(self.det_arr.dets))
+        for det, seq in zip(self.det_arr.dets, seqs):
+            det.set_seed(seq)
+        return
 
     def param(self, param):
         """
@@ -105,6 +166,27 @@ class Channel:
         self._param_vals[param] = new_val
         return
 
+    def resample(self, param):
+        """
+        Re-sample one channel or detector parameter, leaving the other
+        parameters and the spectra as they are
+
+        Args:
+        param (str): name of parameter or param dict key
+        """
+        caps_param = param.replace(" ", "").strip().upper()
+        if param in self.det_dict.keys() or (
+           caps_param in self._det_param_names.keys()):
+            param = self._det_param_names.get(caps_param, param)
+            self._param_vals[param] = self.det_dict[param].get_med()
+            for det in self.det_arr.dets:
+                det.resample(param)
+            return
+        param = self._param_names.get(caps_param, param)
+        self._param_vals[param] = self._param_samp(self._param_dict[param])
+        self._store_ndet()
+        return
+
     def change_param(self, param, new_val):
         """
         Change channel parameter values
@@ -167,7 +249,7 @@ class Channel:
         if self._nexp == 1:
             return param.get_med()
         else:
-            return param.sample(nsample=1)
+            return param.sample(nsample=1, rng=self.rng)
 
     def _store_param(self, name):
         """ Store src.Parameter objects for this channel """
@@ -253,13 +335,7 @@ class Channel:
         for k in self.det_dict:
             self._param_vals[k] = self.det_dict[k].get_med()
         # Derived channel parameters
-        self._param_vals["ndet"] = int(self.param("det_per_waf") *
-                                       self.param("waf_per_ot") *
-                                       self.param("ot"))
-        if str(self.cam.tel.exp.sim.param("ndet")) == "NA":
-            self._param_vals["cdet"] = self._param_vals["ndet"]
-        else:
-            self._param_vals["cdet"] = self.cam.tel.exp.sim.param("ndet")
+        self._store_ndet()
         # Store estimated band center if user-defined band
         if self._band_file is not None and self._bc is not None:
             self._param_vals["bc"] = self._bc
@@ -271,6 +347,17 @@ class Channel:
         self._param_vals["edge_tap"] = None
         return
 
+    def _store_ndet(self):
+        """ Store the number of detectors in the channel """
+        self._param_vals["ndet"] = int(self.param("det_per_waf") *
+                                       self.param("waf_per_ot") *
+                                       self.param("ot"))
+        if str(self.cam.tel.exp.sim.param("ndet")) == "NA":
+            self._param_vals["cdet"] = self._param_vals["ndet"]
+        else:
+            self._param_vals["cdet"] = self.cam.tel.exp.sim.param("ndet")
+        return
+
     def _store_elev_dict(self):
         """ Store distribution of pixel elevations w.r.t. boresight """
         # Load possible pixel elevation files
@@ -335,31 +422,38 @@ class Channel:
                 "Problem constructing detector band for channel "
                 "Band ID = '%s' using Band Center '%s' and FBW '%s'"
                 % (str(self.band_id), str(bc), str(fbw)))
+        # Frequency-dependent CMB factors must be recalculated
+        self.cmb_facts = None
         return
 
     def _calculate(self):
         """ Calculate sky + optics + detector emiss/effic/temp arrays """
         # Load the calculated optical parameters
         elem, emis, tran, temp = self.cam.opt_chn.evaluate(self)
-        # Concatenate the elem/emiss/effic/temp arrays, sky to det
-        self.elem = np.array(
-            [[obs.elem[i][0] + elem + self.det_arr.dets[i].elem
-             for i in range(self._ndet)]
-             for obs in self._obs_set.obs_arr]).astype(np.str)
-        self.emis = np.array(
-            [[obs.emis[i] + emis + self.det_arr.dets[i].emis
-             for i in range(self._ndet)]
-             for obs in self._obs_set.obs_arr]).astype(np.float)
-        self.tran = np.array(
-            [[obs.tran[i] + tran + self.det_arr.dets[i].tran
-             for i in range(self._ndet)]
-             for obs in self._obs_set.obs_arr]).astype(np.float)
-        self.temp = np.array(
-            [[obs.temp[i] + temp + self.det_arr.dets[i].temp
-             for i in range(self._ndet)]
-             for obs in self._obs_set.obs_arr]).astype(np.float)
+        # Element names are the same for every observation and detector
+        self.elem = (self._obs_set.obs_arr[0].elem + elem +
+                     self.det_arr.dets[0].elem)
+        # Store sky spectra per (obs, det), optics spectra once,
+        # and detector spectra per detector
+        nfreq = len(self.freqs)
+        self._segs = {}
+        for key, opt in zip(["emis", "tran", "temp"], [emis, tran, temp]):
+            self._segs[key] = (
+                np.array([getattr(obs, key)
+                          for obs in self._obs_set.obs_arr]).astype(np.float),
+                np.reshape(np.array(opt).astype(np.float), (-1, nfreq)),
+                np.array([getattr(det, key)
+                          for det in self.det_arr.dets]).astype(np.float))
+        # Concatenated arrays are rebuilt on demand
+        self._full = {}
         return
 
+    def _concat(self, quant):
+        """ Concatenated (nobs, ndet, nelem, nfreq) array, sky to det """
+        if quant not in self._full:
+            self._full[quant] = np.concatenate(self.segments(quant), axis=2)
+        return self._full[quant]
+
     def _store_band_index(self):
         """ Store band index for this channel """
         self.band_ind = len(self.cam.chs.keys())
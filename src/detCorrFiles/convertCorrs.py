@@ -0,0 +1,29 @@
+#!/usr/local/bin/python
+
+# Convert the pickled detector correlation tables into a single compressed
+# numpy archive, which is what src/noise.py loads. Only the magnitudes of
+# the correlation factors are used, so the complex tables are stored as |c|
+
+import numpy as np
+import pickle as pkl
+import io
+import os
+
+corr_dir = os.path.split(os.path.abspath(__file__))[0]
+names = {'c_apert': 'coherentApertCorr',
+         'c_stop':  'coherentStopCorr',
+         'i_apert': 'incoherentApertCorr',
+         'i_stop':  'incoherentStopCorr'}
+
+tables = {}
+for key, name in names.items():
+    detPitch, corrFact = pkl.load(io.open(
+        os.path.join(corr_dir, 'PKL', '%s.pkl' % (name)), 'rb'),
+        encoding='latin1')
+    if 'pitch' in tables and not np.array_equal(tables['pitch'], detPitch):
+        raise Exception('Detector pitch grid differs for %s' % (name))
+    tables['pitch'] = np.array(detPitch).astype(float)
+    tables[key] = np.abs(np.array(corrFact)).astype(float)
+
+np.savez_compressed(os.path.join(corr_dir, 'NPZ', 'detCorrTables.npz'),
+                    **tables)
@@ -16,6 +16,8 @@ class Detector:
     emis (list): detector emissivity vs frequency
     tran (list): detector transmission vs frequency
     temp (list): detector temperatrue
+    rng (np.random.Generator): random generator for parameter sampling.
+    Defaults to None, which uses the global numpy random state
     """
     def __init__(self, det_arr):
         # Store passed parameters
@@ -24,6 +26,7 @@ class Detector:
         self._log = self._ch.cam.tel.exp.sim.log
         self._phys = self._ch.cam.tel.exp.sim.phys
         self._ndet = self._ch.cam.tel.exp.sim.param("ndet")
+        self.rng = None
 
         # Minimum allowed Tc minus Tb [K]
         self._min_tc_tb_diff = 0.010
@@ -55,13 +58,39 @@ class Detector:
     def param(self, param):
         return self._param_vals[param]
 
+    def resample(self, param):
+        """
+        Re-sample one detector parameter, leaving the other parameters
+        and the band as they are
+
+        Args:
+        param (str): param dict key
+        """
+        self._param_vals[param] = self._param_samp(self._param_dict[param])
+        # Tc may have been derived from the previous Tc fraction
+        if param == "tc_frac":
+            self._param_vals["tc"] = self._param_samp(self._param_dict["tc"])
+        if param in ["tc", "tc_frac"]:
+            self._store_tc()
+        return
+
+    def set_seed(self, seed_seq):
+        """
+        Give this detector its own random generator
+
+        Args:
+        seed_seq (np.random.SeedSequence): seed sequence for this detector
+        """
+        self.rng = np.random.default_rng(seed_seq)
+        return
+
     # ***** Helper Methods *****
     def _param_samp(self, param):
         """ Sample detector parameter """
         if self._ndet == 1:
             return param.get_med()
         else:
-            return param.sample(nsample=1)
+            return param.sample(nsample=1, rng=self.rng)
 
     def _store_param_dict(self):
         """ Store the paramter dictionary, which is defined at the channel """
@@ -76,6 +105,11 @@ class Detector:
 
         # Store bath and transition temperature
         self._param_vals["tb"] = self._ch.cam.param("tb")
+        self._store_tc()
+        return
+
+    def _store_tc(self):
+        """ Store the transition temperature, given the bath temperature """
         if "NA" in str(self.param("tc")):
             if "NA" in str(self.param("tc_frac")):
                 self._log.err(
@@ -97,7 +131,6 @@ class Detector:
                        self._ch.cam.dir, self._min_tc_tb_diff))
                 self._param_vals["tc"] = (
                     self._param_vals["tb"] + self._min_tc_tb_diff)
-
         return
 
     def _store_band(self, band=None):
@@ -133,7 +166,7 @@ class Detector:
             bc_std = bc_param.get_std()
             if isinstance(bc_std, float) or isinstance(bc_std, np.float):
                 self._param_vals["bshift"] = bc_param.sample(
-                    max=np.inf, min=-np.inf, null=True)
+                    max=np.inf, min=-np.inf, null=True, rng=self.rng)
                 delta_f = self._param_vals["bshift"]
                 delta_ind = int(np.round(delta_f / np.diff(freqs)[0]))
                 if delta_ind != 0:
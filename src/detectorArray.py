@@ -38,7 +38,8 @@ class DetectorArray:
             if self._ndet == 1:
                 bands = self.ch.det_band.get_avg()
             else:
-                bands = self.ch.det_band.sample(nsample=self._ndet)
+                bands = self.ch.det_band.sample(
+                    nsample=self._ndet, rng=self.ch.rng)
             for det, band in zip(self.dets, bands):
                 det.evaluate(band)
         # Otherwise, simply evaluate the detectors
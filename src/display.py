@@ -4,6 +4,7 @@ import itertools as it
 import os
 
 # BoloCalc modules
+import src.sketch as sk
 import src.unit as un
 
 
@@ -78,49 +79,20 @@ class Display:
 
     # ***** Helper Methods *****
     def _merge_exps(self):
-        # Loop over experiment realizations
-        self._sns = []
-        self._opts = []
-        nexp = len(self._sim.senses)
-        ntel = len(self._sim.senses[0])
-        for i in range(ntel):
-            sns_1 = []
-            opts_1 = []
-            ncam = len(self._sim.senses[0][i])
-            for j in range(ncam):
-                sns_2 = []
-                opts_2 = []
-                nch = len(self._sim.senses[0][i][j])
-                for k in range(nch):
-                    # Merge sensitivities
-                    sns_3 = []
-                    nparam = len(self._sim.senses[0][i][j][k])
-                    for m in range(nparam):
-                        sn_arrs = []
-                        opt_arrs = []
-                        for n in range(nexp):
-                            sn_arrs.append(
-                                self._sim.senses[n][i][j][k][m])
-                        sns_3.append(np.concatenate(sn_arrs).tolist())
-                    # Merge optical powers
-                    opts_3 = []
-                    nparam = len(self._sim.opt_pows[0][i][j][k])
-                    for m in range(nparam):
-                        opts_4 = []
-                        nopt = len(self._sim.opt_pows[0][i][j][k][m])
-                        for n in range(nopt):
-                            opt_arrs = []
-                            for p in range(nexp):
-                                opt_arrs.append(
-                                    self._sim.opt_pows[p][i][j][k][m][n])
-                            opts_4.append(np.concatenate(opt_arrs).tolist())
-                        opts_3.append(opts_4)
-                    sns_2.append(sns_3)
-                    opts_2.append(opts_3)
-                sns_1.append(sns_2)
-                opts_1.append(opts_2)
-            self._sns.append(sns_1)
-            self._opts.append(opts_1)
+        # Experiment realizations are stored side by side in the results
+        results = self._sim.results
+        if not np.all(results.filled):
+            self._sim.log.err(
+                "Cannot display outputs before all experiment "
+                "realizations are simulated")
+        self._sns = results.sens
+        self._opts = results.opt_pow
+        # Sketches do not keep every value for output.txt
+        self._stream = results.streaming
+        if self._stream:
+            self._sim.log.log(
+                "Output spreads are estimated from quantile sketches with "
+                "a rank error of at most %.2g" % (results.rank_err()))
         return
 
     def _table_format(self):
@@ -219,6 +191,11 @@ class Display:
         return
 
     def _init_cam_output(self, cam):
+        if self._stream:
+            self._sim.log.log(
+                "Not writing %s when streaming outputs"
+                % (os.path.join(cam.dir, 'output.txt')))
+            return
         self._cam_d = open(os.path.join(
             cam.dir, 'output.txt'), 'w+')
         return
@@ -226,13 +203,19 @@ class Display:
     def _write_cam_table_row(self, ch, tup):
         # tup (i,j,k) = (tel,cam,ch) tuple
         sns = self._sns[tup[0]][tup[1]][tup[2]]
-        # Convert from SI
-        sns = [list(self._units.values())[i].from_SI(np.array(sns[i]))
-               for i in range(len(sns))]
-        # Save the camera data
-        self._cam_data.append(sns)
-        # Calculate the spreads
-        spreads = [self._spread(sn) for sn in sns]
+        units = list(self._units.values())
+        if self._stream:
+            # Calculate the spreads from the sketches
+            spreads = [self._spread(sns[i], units[i])
+                       for i in range(len(sns))]
+        else:
+            # Convert from SI
+            sns = [units[i].from_SI(np.array(sns[i]))
+                   for i in range(len(sns))]
+            # Save the camera data
+            self._cam_data.append(sns)
+            # Calculate the spreads
+            spreads = [self._spread(sn) for sn in sns]
         # Values to be stored for combining at higher levels
         ch_name = ch.param("ch_name")
         ndet = ch.param("ndet")
@@ -289,8 +272,8 @@ class Display:
         self._opt_f.write(self._break_opt)
         self._opt_f.write(self._unit_opt)
         self._opt_f.write(self._break_opt)
-        for m in range(len(ch.elem[0][0])):  # nelem
-            elem_name = ch.elem[0][0][m]
+        for m in range(len(ch.elem)):  # nelem
+            elem_name = ch.elem[m]
             wstr = ("| %-15s | %-6.3f +/- (%-6.3f,%6.3f) | "
                     "%-5.3f +/- (%-5.3f,%5.3f) | "
                     "%-5.3f +/- (%-5.3f,%5.3f) | "
@@ -352,8 +335,11 @@ class Display:
         return
 
     def _write_cam_output(self):
+        if self._stream:
+            return
         self._write_output(
             self._cam_d, self._title_cam_d, self._cam_data)
+        self._cam_d.close()
         return
 
     def _write_tel_exp(self, val_dict, f):
@@ -429,6 +415,9 @@ class Display:
         pct_lo, pct_hi = self._sim.param("pct")
         if unit is None:
             unit = un.Unit("NA")
-        lo, med, hi = unit.from_SI(np.percentile(
-            inp, (float(pct_lo), 50.0, float(pct_hi))))
+        pcts = (float(pct_lo), 50.0, float(pct_hi))
+        if isinstance(inp, sk.Sketch):
+            lo, med, hi = unit.from_SI(inp.percentile(pcts))
+        else:
+            lo, med, hi = unit.from_SI(np.percentile(inp, pcts))
         return [med, abs(hi-med), abs(med-lo)]
@@ -67,17 +67,21 @@ class Distribution:
             self._cum = np.cumsum(self.prob)
 
     # ***** Public Methods *****
-    def sample(self, nsample=1):
+    def sample(self, nsample=1, rng=None):
         """
         Samle the distribution nsample times
 
         Args:
         nsample (int): the number of times to sample the distribution
+        rng (np.random.Generator): random generator to sample with.
+        Defaults to None, which uses the global numpy random state
         """
+        if rng is None:
+            rng = np.random
         if nsample == 1:
-            samps = np.random.choice(self.val, size=nsample, p=self.prob)[0]
+            samps = rng.choice(self.val, size=nsample, p=self.prob)[0]
         else:
-            samps = np.random.choice(self.val, size=nsample, p=self.prob)
+            samps = rng.choice(self.val, size=nsample, p=self.prob)
         samps = np.where(samps > self._max, self._max, samps)
         samps = np.where(samps < self._min, self._min, samps)
         return samps
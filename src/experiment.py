@@ -1,4 +1,5 @@
 # Built-in modules
+import numpy as np
 import glob as gb
 import os
 
@@ -18,6 +19,8 @@ class Experiment:
 
     Attributes:
     dir (str): the input directory for the experiment
+    rng (np.random.Generator): random generator for parameter sampling.
+    Defaults to None, which uses the global numpy random state
 
     Parents:
     sim (src.Simulation): Simulation object
@@ -34,6 +37,7 @@ class Experiment:
         # Experiment directory
         self.dir = self.sim.exp_dir
         self.name = self.dir.split(os.sep)[-2]
+        self.rng = None
 
         # Generate the experiment
         self._log.log("Generating expeiment realization from %s" % (self.dir))
@@ -56,6 +60,19 @@ class Experiment:
             tel.evaluate()
         return
 
+    def set_seed(self, seed_seq):
+        """
+        Give this experiment and its children independent random generators
+
+        Args:
+        seed_seq (np.random.SeedSequence): seed sequence for this experiment
+        """
+        self.rng = np.random.default_rng(seed_seq)
+        seqs = seed_seq.spawn(len(self.tels))
+        for tel, seq in zip(self.tels.values(), seqs):
+            tel.set_seed(seq)
+        return
+
     def param(self, param):
         """
         Return parameter from param_vals
@@ -108,7 +125,7 @@ class Experiment:
         if self.sim.param("nexp"):
             return param.get_med()
         else:
-            return param.sample(nsample=1)
+            return param.sample(nsample=1, rng=self.rng)
 
     def _store_param(self, name):
         """ Generate src.Parameter object and return it """
@@ -5,6 +5,7 @@ import os
 
 # BoloCalc modules
 import src.distribution as ds
+import src.band as bd
 
 
 class Loader:
@@ -22,6 +23,8 @@ class Loader:
         self._opt_dir = "Optics"
         self._det_dir = "Detectors"
         self._ftypes = ["CSV", "TXT"]
+        # Interpolated Band objects keyed by (file, mtime, frequencies)
+        self._bands = {}
 
     # ***** Public methods *****
     def sim(self, fname):
@@ -67,6 +70,23 @@ class Loader:
         else:
             self._log.err("Illegal file format passed to Loader.band()")
 
+    def band_interp(self, fname, freqs):
+        """
+        Band object for a band file interpolated to the passed frequencies.
+        Each file is parsed once per modification and frequency grid, and
+        the Band object is shared between callers, which must not change it
+
+        Args:
+        fname (str): band file name
+        freqs (list): frequencies [Hz] at which to evaluate the band
+        """
+        freqs = np.asarray(freqs, dtype=np.float64)
+        key = (os.path.abspath(fname), os.path.getmtime(fname),
+               freqs.tobytes())
+        if key not in self._bands:
+            self._bands[key] = bd.Band(self._log, self, fname, freqs)
+        return self._bands[key]
+
     def optics_bands(self, inp_dir):
         """
         Load all band files in a specified directory for an optical chain.
@@ -76,6 +76,11 @@ class Log:
         sy.stderr.write(wrn_msg+"\n"),
         return
 
+    def flush(self):
+        """ Flush buffered messages to the log file """
+        self._f.flush()
+        return
+
     # ***** Private methods *****
     def _write(self, msg):
         """ Write message to log file """
@@ -22,24 +22,13 @@ class Noise:
         # Aperture stop names
         self._ap_names = ["APERT", "STOP", "LYOT"]
 
-        # Correlation files
-        corr_dir = os.path.join(
-            os.path.split(__file__)[0], "detCorrFiles", "PKL")
-        self._p_c_apert, self._c_apert = pk.load(io.open(
-            os.path.join(corr_dir, "coherentApertCorr.pkl"), "rb"),
-                            encoding="latin1")
-        self._p_c_stop,  self._c_stop = pk.load(io.open(
-            os.path.join(corr_dir, "coherentStopCorr.pkl"), "rb"),
-                            encoding="latin1")
-        self._p_i_apert, self._i_apert = pk.load(io.open(
-            os.path.join(corr_dir, "incoherentApertCorr.pkl"), "rb"),
-                            encoding="latin1")
-        self._p_i_stop,  self._i_stop = pk.load(io.open(
-            os.path.join(corr_dir, "incoherentStopCorr.pkl"), "rb"),
-                            encoding="latin1")
-
-        # Detector pitch array
-        self._det_p = self._p_c_apert
+        # Correlation tables, loaded on first use
+        self._corr_dir = os.path.join(
+            os.path.split(__file__)[0], "detCorrFiles")
+        self._corr_tabs = None
+        # Memoized correlation factors
+        self._ring_sums = {}
+        self._corr_facts = {}
         # Geometric pitch factor
         self._geo_fact = 6  # Hex packing
 
@@ -72,27 +61,20 @@ class Noise:
         """
         Calculate the Bose white-noise correlation factor
 
+        Factors are memoized by elements and pitch, so repeated calls
+        for the same channel are free
+
         Args:
-        elems (list): optical elements in the camera
+        elems (list): element names, one per element in the chain
         det_pitch (float): detector pitch in f-lambda units
         flamb_max (float): the maximum detector pitch distance
         for which to calculate the correlation factor.
         Default is 3.
         """
-        ndets = int(round(flamb_max / (det_pitch), 0))
-        inds1 = [np.argmin(abs(np.array(self._det_p) -
-                 det_pitch * (n + 1)))
-                 for n in range(ndets)]
-        inds2 = [np.argmin(abs(np.array(self._det_p) -
-                 det_pitch * (n + 1) * np.sqrt(3.)))
-                 for n in range(ndets)]
-        inds = np.sort(inds1 + inds2)
-        c_apert = np.sum([abs(self._c_apert)[ind] for ind in inds])
-        i_apert = np.sum([abs(self._c_apert)[ind] for ind in inds])
-        i_stop = np.sum([abs(self._c_stop)[ind] for ind in inds])
-        c_apert = np.sqrt(c_apert*self._geo_fact + 1.)
-        i_apert = np.sqrt(i_apert*self._geo_fact + 1.)
-        i_stop = np.sqrt(i_stop*self._geo_fact + 1.)
+        key = (tuple(elems), float(det_pitch), float(flamb_max))
+        if key in self._corr_facts:
+            return self._corr_facts[key]
+        c_apert, i_apert, i_stop = self._ring_sum(det_pitch, flamb_max)
         at_det = False
         factors = []
         for i in range(len(elems)):
@@ -105,8 +87,10 @@ class Noise:
                 factors.append(i_apert)
             else:
                 factors.append(1.)
-        # return np.array(factors[:-1])
-        return np.array(factors)
+        factors = np.array(factors)
+        factors.setflags(write=False)
+        self._corr_facts[key] = factors
+        return factors
 
     def photon_NEP(self, popts, freqs, elems=None, det_pitch=None):
         """
@@ -115,31 +99,45 @@ class Noise:
         Args:
         popts (list): power from elements in the optical elements [W]
         freqs (list): frequencies of observation [Hz]
-        elems (list): optical elements
+        elems (list): element names, one per element in the chain
+        det_pitch (float): detector pitch in f-lambda units. Default is None.
+        """
+        return self.photon_NEP_batch(
+            np.array(popts).astype(np.float), freqs, elems, det_pitch)
+
+    def photon_NEP_batch(self, popts, freqs, elems=None, det_pitch=None):
+        """
+        Calculate photon NEP [W/rtHz] for a stack of detectors
+
+        The photon bunching term sum_ij f_i f_j P_i P_j is evaluated as
+        the square of the correlation-weighted sum (sum_i f_i P_i)^2
+        at each frequency
+
+        Args:
+        popts (array): power spectra from the optical elements [W/Hz]
+        with shape (..., nelem, nfreq), such as (nobs, ndet, nelem, nfreq),
+        or a list of such arrays that split the element axis into
+        segments and broadcast against each other
+        freqs (list): frequencies of observation [Hz]
+        elems (list): element names, one per element in the chain
         det_pitch (float): detector pitch in f-lambda units. Default is None.
         """
-        popt = sum([x for x in popts])
+        if not isinstance(popts, list):
+            popts = [popts]
+        popt = sum([np.sum(seg, axis=-2) for seg in popts])
+        shot = 2. * self._phys.h * np.array(freqs) * popt
+        nep = np.sqrt(np.trapz(shot + 2. * popt**2, freqs))
         # Don't consider correlations
         if elems is None and det_pitch is None:
-            popt2 = sum([x*y for x in popts for y in popts])
-            nep = np.sqrt(np.trapz(
-                (2. * self._phys.h * freqs * popt + 2. * popt2), freqs))
-            neparr = nep
-            return nep, neparr
+            return nep, nep
         # Consider correlations
-        else:
-            factors = self.corr_facts(elems, det_pitch)
-            popt2 = sum([popts[i] * popts[j]
-                         for i in range(len(popts))
-                         for j in range(len(popts))])
-            popt2arr = sum([factors[i] * factors[j] * popts[i] * popts[j]
-                            for i in range(len(popts))
-                            for j in range(len(popts))])
-            nep = np.sqrt(np.trapz(
-                (2. * self._phys.h * freqs * popt + 2. * popt2), freqs))
-            neparr = np.sqrt(np.trapz(
-                (2. * self._phys.h * freqs * popt + 2. * popt2arr), freqs))
-            return nep, neparr
+        factors = np.split(
+            self.corr_facts(elems, det_pitch),
+            np.cumsum([seg.shape[-2] for seg in popts])[:-1])
+        popt_corr = sum([np.einsum('i,...if->...f', fact, seg)
+                         for fact, seg in zip(factors, popts)])
+        neparr = np.sqrt(np.trapz(shot + 2. * popt_corr**2, freqs))
+        return nep, neparr
 
     def bolo_NEP(self, flink, G, Tc):
         """
@@ -176,6 +174,32 @@ class Noise:
         return np.trapz(self._phys.ani_pow_spec(
             np.array(freqs), temp, np.array(eff)), freqs)
 
+    def dPdT_kernel(self, freqs):
+        """
+        CMB dP/dT spectrum [W/K/Hz] multiplied by the trapezoid-rule weights
+        of the frequency grid, such that dPdT(eff, freqs) equals
+        np.dot(eff, dPdT_kernel(freqs)) for any efficiency spectrum
+
+        Args:
+        freqs (float): observation frequencies [Hz]
+        """
+        freqs = np.array(freqs).astype(np.float)
+        wts = np.zeros(len(freqs))
+        dfreq = np.diff(freqs) / 2.
+        wts[:-1] += dfreq
+        wts[1:] += dfreq
+        return wts * self._phys.ani_pow_spec(freqs, self._phys.Tcmb)
+
+    def NET_from_dPdT(self, nep, dpdt):
+        """
+        NET [K-rts] from NEP and dP/dT
+
+        Args:
+        nep (float): NEP [W/rtHz]
+        dpdt (float): change in detector power with CMB temperature [W/K]
+        """
+        return nep / (np.sqrt(2.) * dpdt)
+
     def NET_from_NEP(self, nep, freqs, sky_eff, opt_coup=1.0):
         """
         NET [K-rts] from NEP
@@ -187,7 +211,7 @@ class Noise:
         opt_coup (float): optical coupling to the detector. Default to 1.
         """
         dpdt = opt_coup * self.dPdT(sky_eff, freqs)
-        return nep / (np.sqrt(2.) * dpdt)
+        return self.NET_from_dPdT(nep, dpdt)
 
     def NET_arr(self, net, n_det, det_yield=1.0):
         """
@@ -212,3 +236,57 @@ class Noise:
         return np.sqrt(
             (4. * self._phys.PI * fsky * 2. * np.power(net_arr, 2.)) /
             (tobs * obs_eff)) * (10800. / self._phys.PI)
+
+    # ***** Helper Methods *****
+    def _tabs(self):
+        """ Detector correlation tables, loaded on first use """
+        if self._corr_tabs is None:
+            npz_file = os.path.join(
+                self._corr_dir, "NPZ", "detCorrTables.npz")
+            if os.path.exists(npz_file):
+                with np.load(npz_file) as f:
+                    self._corr_tabs = {k: f[k] for k in f.files}
+            else:
+                self._corr_tabs = self._load_pkl_tabs()
+        return self._corr_tabs
+
+    def _load_pkl_tabs(self):
+        """ Load the pickled detector correlation tables """
+        pkl_dir = os.path.join(self._corr_dir, "PKL")
+        files = {"c_apert": "coherentApertCorr.pkl",
+                 "c_stop": "coherentStopCorr.pkl",
+                 "i_apert": "incoherentApertCorr.pkl",
+                 "i_stop": "incoherentStopCorr.pkl"}
+        tabs = {}
+        for key, fname in files.items():
+            pitch, corr = pk.load(io.open(
+                os.path.join(pkl_dir, fname), "rb"), encoding="latin1")
+            tabs["pitch"] = np.array(pitch).astype(np.float)
+            tabs[key] = abs(np.array(corr))
+        return tabs
+
+    def _nearest(self, pitch):
+        """ Indices of the tabulated detector pitches nearest to 'pitch' """
+        det_p = self._tabs()["pitch"]
+        ind = np.clip(np.searchsorted(det_p, pitch), 1, len(det_p) - 1)
+        # Ties go to the lower index, as with np.argmin
+        lower = abs(det_p[ind - 1] - pitch) <= abs(det_p[ind] - pitch)
+        return np.where(lower, ind - 1, ind)
+
+    def _ring_sum(self, det_pitch, flamb_max):
+        """ Summed correlation factors over the neighboring detectors """
+        key = (float(det_pitch), float(flamb_max))
+        if key not in self._ring_sums:
+            tabs = self._tabs()
+            ndets = int(round(flamb_max / (det_pitch), 0))
+            rings = det_pitch * np.arange(1, ndets + 1)
+            inds = np.sort(np.concatenate((
+                self._nearest(rings), self._nearest(rings * np.sqrt(3.)))))
+            c_apert = np.sum(tabs["c_apert"][inds])
+            i_apert = np.sum(tabs["c_apert"][inds])
+            i_stop = np.sum(tabs["c_stop"][inds])
+            self._ring_sums[key] = (
+                np.sqrt(c_apert * self._geo_fact + 1.),
+                np.sqrt(i_apert * self._geo_fact + 1.),
+                np.sqrt(i_stop * self._geo_fact + 1.))
+        return self._ring_sums[key]
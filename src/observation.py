@@ -13,9 +13,9 @@ class Observation:
 
     Attributes:
     elem (list): sky element names
-    emis (list): sky element absorbtivities
-    tran (list): sky element transmissions
-    temp (list): sky element temperatures
+    emis (array): sky element absorbtivities, shape (ndet, nelem, nfreq)
+    tran (array): sky element transmissions, shape (ndet, nelem, nfreq)
+    temp (array): sky element temperatures, shape (ndet, nelem, nfreq)
 
     Parents:
     obs_set (src.ObservationSet): ObservationSet object
@@ -37,21 +37,21 @@ class Observation:
 
         # Store sky values
         elem, emis, tran, temp = self._get_sky_vals()
-        self.elem = np.transpose(np.squeeze(elem, axis=1), (0, 2, 1)).tolist()
-        self.emis = np.squeeze(emis, axis=1).tolist()
-        self.tran = np.squeeze(tran, axis=1).tolist()
-        self.temp = np.squeeze(temp, axis=1).tolist()
+        self.elem = elem
+        self.emis = emis
+        self.tran = tran
+        self.temp = temp
         return
 
     # ***** Helper Methods *****
     def _get_temp_pwv_elev(self):
         """ Sample the pixel elevation """
         # Sample sky temperature
-        self._sky_temp = self._tel.sky_temp_sample()
+        self._sky_temp = self._tel.sky_temp_sample(self._ch.rng)
         # Sample PWV
-        self._pwv = self._sky.pwv_sample()
+        self._pwv = self._sky.pwv_sample(self._ch.rng)
         # Sample telescope elevation
-        tel_elev = self._scn.elev_sample()
+        tel_elev = self._scn.elev_sample(self._ch.rng)
         # Retrieve camera boresight elevation
         cam_elev = self._obs_set.ch.cam.param("bore_elev")
         # Sample pixel elevation
@@ -59,7 +59,8 @@ class Observation:
         if self._ndet == 1:
             self._pix_elev = [bore_elev]
         else:
-            pix_elev = self._obs_set.sample_pix_elev(self._ndet)
+            pix_elev = self._obs_set.sample_pix_elev(
+                self._ndet, rng=self._ch.rng)
             self._pix_elev = pix_elev + bore_elev
         # Maximum allowed elevation = 90 deg, minimum = 20 deg
         self._pix_elev = np.array([e if e > self._scn.min_elev
@@ -71,7 +72,6 @@ class Observation:
         return
 
     def _get_sky_vals(self):
-        """ Get the sky values """
-        return np.hsplit(np.array([self._sky.evaluate(
-            self._sky_temp, self._pwv, elev, self._ch.freqs)
-            for elev in self._pix_elev]), 4)
+        """ Get the sky values for all pixel elevations """
+        return self._sky.evaluate_elevs(
+            self._sky_temp, self._pwv, self._pix_elev, self._ch.freqs)
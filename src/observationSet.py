@@ -54,11 +54,20 @@ class ObservationSet:
             obs.evaluate()
         return
 
-    def sample_pix_elev(self, nsamp=1):
-        """ Sample pixel elevation w.r.t. its camera's boresight """
+    def sample_pix_elev(self, nsamp=1, rng=None):
+        """
+        Sample pixel elevation w.r.t. its camera's boresight
+
+        Args:
+        nsamp (int): number of pixel elevations to sample
+        rng (np.random.Generator): random generator to sample with.
+        Defaults to None, which uses the global numpy random state
+        """
+        if rng is None:
+            rng = np.random
         # Sample pixel elevation w.r.t. boresight distribution if defined
         if self._elev_vals is not None and self._elev_frac is not None:
-            return np.random.choice(
+            return rng.choice(
                 self._elev_vals, size=nsamp,
                 p=self._elev_frac / float(np.sum(self._elev_frac)))
         # Otherwise, return 0 deg
@@ -4,7 +4,6 @@ import os
 
 # BoloCalc modules
 import src.parameter as pr
-import src.band as bd
 
 
 class Optic:
@@ -126,17 +125,22 @@ class Optic:
                 % (str(param)))
 
     # ***** Helper Methods *****
-    def _pow_frac(self, T1, T2, freqs):
-        """ Fractional power between two physical temperatures """
-        return (self._phys.bb_pow_spec(freqs, T1) /
-                self._phys.bb_pow_spec(freqs, T2))
+    def _pow_fracs(self, temps, T2, freqs):
+        """
+        Fractional powers between each of several physical temperatures
+        and a reference temperature, evaluated in one call
+        """
+        pows = self._phys.bb_pow_spec(
+            freqs, np.array(list(temps) + [T2]))
+        return pows[:-1] / pows[-1]
 
     def _param_samp(self, param, band_ind):
         """ Sample optic parameter for given band """
         if self._nexp == 1:
             return param.get_med(band_ind=band_ind)
         else:
-            return param.sample(band_ind=band_ind, nsample=1)
+            return param.sample(
+                band_ind=band_ind, nsample=1, rng=self._ch.rng)
 
     def _store_param(self, name):
         """ Store Parameter objects for this optic """
@@ -336,12 +340,12 @@ class Optic:
     def _calculate(self):
         """ Calculate emission, efficiency and temperature for this optic """
         # Absorption array
+        spill_frac, scatt_frac = self._pow_fracs(
+            [self._spill_temp, self._scatt_temp], self._temp, self._ch.freqs)
         self._emiss = (
             self._abso +
-            self._spill * self._pow_frac(
-                self._spill_temp, self._temp, self._ch.freqs) +
-            self._scatt * self._pow_frac(
-                self._scatt_temp, self._temp, self._ch.freqs))
+            self._spill * spill_frac +
+            self._scatt * scatt_frac)
 
         # Efficiency array
         self._effic = ((1 - self._refl) * (1 - self._abso) *
@@ -368,14 +372,13 @@ class Optic:
         elem = self._param_vals["elem"]
         if key in self._band_dict.keys():
             band_f = self._band_dict[key]
-            load_band = bd.Band(self._log, self._load,
-                                band_f, self._ch.freqs)
+            load_band = self._load.band_interp(band_f, self._ch.freqs)
             # Sample the band if number of experiment realizations
             # is greater than one; otherwise, get the average band
             if self._nexp == 1:
                 samp_band = load_band.get_avg()[0]
             else:
-                samp_band = load_band.sample()[0]
+                samp_band = load_band.sample(rng=self._ch.rng)[0]
             # Enforce physical limits
             samp_band = self._phys_lims(samp_band)
         else:
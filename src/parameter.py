@@ -190,7 +190,7 @@ class Parameter:
         return self.fetch(band_ind)[2]
 
     def sample(self, band_ind=None, nsample=1,
-               min=None, max=None, null=False):
+               min=None, max=None, null=False, rng=None):
         """
         Sample parameter distribution for band_id nsample times
         and return the sampled values in an array if nsample > 1
@@ -203,7 +203,11 @@ class Parameter:
         min (float): the minimum allowed value to be returned
         max (float): the maximum allowed value to be returned
         null (bool): whether to sample around zero
+        rng (np.random.Generator): random generator to sample with.
+        Defaults to None, which uses the global numpy random state
         """
+        if rng is None:
+            rng = np.random
         # If min and max not explicitly passed, use constructor values
         if min is None:
             min = self._min
@@ -211,7 +215,7 @@ class Parameter:
             max = self._max
         # If this parameter is a distribution, just sample it
         if isinstance(self._val, ds.Distribution):
-            samp = self._float(self._val.sample(nsample=nsample))
+            samp = self._float(self._val.sample(nsample=nsample, rng=rng))
             # Check that the sampled value doesn't surpasse the max or min
             if min is not None and samp < min:
                 return min
@@ -239,9 +243,9 @@ class Parameter:
             if str(std) == "NA" or np.any(std <= 0.):
                 return samp_avg
             elif nsample == 1:
-                samp = np.random.normal(samp_avg, std, nsample)[0]
+                samp = rng.normal(samp_avg, std, nsample)[0]
             else:
-                samp = np.random.normal(samp_avg, std, nsample)
+                samp = rng.normal(samp_avg, std, nsample)
             # Check that the sampled value doesn't surpasse the max or min
             if min is not None and samp < min:
                 return min
@@ -1,5 +1,6 @@
 # Built-in modules
 import numpy as np
+import collections as cl
 
 
 class Physics:
@@ -27,6 +28,11 @@ class Physics:
         self.Z0 = np.sqrt(self.mu0/self.ep0)
         self.Tcmb = 2.725
 
+        # Per-frequency-grid factors, least-recently used first, keyed by
+        # the id, shape, and end values of the grid array
+        self._grids = cl.OrderedDict()
+        self._max_grids = 64
+
     # ***** Public Methods *****
     def lamb(self, freq, ind=1.0):
         """
@@ -144,9 +150,9 @@ class Physics:
         Tb (float): physical temperature. Default to Tcmb
         """
         freq, Tb = self._check_inputs(freq, [Tb])
-        x = (self.h * freq)/(Tb * self.kB)
+        x = self._grid(freq)[0] / Tb
         thermo_fact = np.power(
-            (np.exp(x) - 1.), 2.) / (np.power(x, 2.) * np.exp(x))
+            np.expm1(x), 2.) / (np.power(x, 2.) * np.exp(x))
         return 1. / thermo_fact
 
     def Tb_from_spec_rad(self, freq, pow_spec):
@@ -204,10 +210,9 @@ class Physics:
         temp (float): blackbody temperature [K]
         """
         freq, temp = self._check_inputs(freq, [temp])
-        fact = (self.h * freq)/(self.kB * temp)
-        fact = np.where(fact > 100, 100, fact)
+        fact = np.minimum(self._grid(freq)[0] / temp, 100.)
         with np.errstate(divide='raise'):
-            return 1. / (np.exp(fact) - 1.)
+            return 1. / np.expm1(fact)
 
     def a_omega(self, freq):
         """
@@ -231,8 +236,7 @@ class Physics:
         emiss (float): blackbody emissivity. Defaults to 1.
         """
         freq, temp, emis = self._check_inputs(freq, [temp, emis])
-        return (emis * (2 * self.h * (freq**3) /
-                (self.c**2)) * self.n_occ(freq, temp))
+        return emis * self._grid(freq)[1] * self.n_occ(freq, temp)
 
     def bb_pow_spec(self, freq, temp, emis=1.0):
         """
@@ -246,7 +250,7 @@ class Physics:
         emiss (float): blackbody emissivity. Defaults to 1.
         """
         freq, temp, emis = self._check_inputs(freq, [temp, emis])
-        return 0.5 * self.a_omega(freq) * self.bb_spec_rad(freq, temp, emis)
+        return emis * self._grid(freq)[2] * self.n_occ(freq, temp)
 
     def ani_pow_spec(self, freq, temp, emiss=1.0):
         """
@@ -261,12 +265,47 @@ class Physics:
         emiss (float): blackbody emissivity, Defaults to 1.
         """
         freq, temp, emiss = self._check_inputs(freq, [temp, emiss])
-        return (((self.h**2) / self.kB) * emiss *
-                (self.n_occ(freq, temp)**2) * ((freq**2)/(temp**2)) *
-                np.exp((self.h * freq)/(self.kB * temp)))
+        x = self._grid(freq)[0] / temp
+        return (self.kB * emiss * (self.n_occ(freq, temp)**2) *
+                (x**2) * np.exp(x))
 
     # ***** Helper Methods *****
+    def _grid(self, freq):
+        """
+        h * freq / kB [K], the spectral radiance prefactor 2 h freq^3 / c^2,
+        and the diffraction-limited power prefactor h * freq [J],
+        computed once per frequency grid array
+
+        Args:
+        freq (float): frequencies [Hz]
+        """
+        if not isinstance(freq, np.ndarray) or freq.size == 0:
+            return self._grid_facts(freq)
+        # The shape and end values catch grids edited in place
+        key = (id(freq), freq.shape, freq.flat[0], freq.flat[-1])
+        if key in self._grids and self._grids[key][0] is freq:
+            self._grids.move_to_end(key)
+            return self._grids[key][1]
+        # Hold a reference to the grid so that its id is not reused
+        facts = self._grid_facts(freq)
+        self._grids[key] = (freq, facts)
+        self._grids.move_to_end(key)
+        if len(self._grids) > self._max_grids:
+            self._grids.popitem(last=False)
+        return facts
+
+    def _grid_facts(self, freq):
+        """ Frequency-only factors returned by _grid() """
+        spec_rad = 2 * self.h * (freq**3) / (self.c**2)
+        return ((self.h * freq) / self.kB, spec_rad,
+                0.5 * ((self.c / freq)**2) * spec_rad)
+
     def _check_inputs(self, x, inputs=None):
+        # Float arrays pass through without copies. Array inputs
+        # of any shape that broadcasts against x are allowed,
+        # e.g. (nobs, ndet, nelem, 1) temperatures against (nfreq,) freqs
+        if isinstance(x, np.ndarray) and x.dtype.kind == "f":
+            return self._broadcast_inputs(x, inputs)
         ret = []
         if isinstance(x, np.ndarray) or isinstance(x, list):
             x = np.array(x).astype(np.float)
@@ -299,3 +338,20 @@ class Physics:
             raise Exception(
                 "Non-numeric value %s passed in Physics" % (str(x)))
         return ret
+
+    def _broadcast_inputs(self, x, inputs=None):
+        """ Fast path of _check_inputs() for float ndarray x """
+        if inputs is None:
+            return x
+        ret = [x]
+        for inp in inputs:
+            if callable(inp):
+                ret.append(np.asarray(inp(x), dtype=np.float))
+            elif isinstance(inp, np.ndarray) or isinstance(inp, list):
+                ret.append(np.asarray(inp, dtype=np.float))
+            elif isinstance(inp, (int, float, np.number)):
+                ret.append(float(inp))
+            else:
+                raise Exception(
+                    "Non-numeric value %s passed in Physics" % (str(inp)))
+        return ret
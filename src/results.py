@@ -0,0 +1,171 @@
+# Built-in modules
+import numpy as np
+
+# BoloCalc modules
+import src.sketch as sk
+
+
+class Results:
+    """
+    Results object stores the sensitivities and optical power tables of
+    every experiment realization in preallocated float64 arrays, one per
+    telescope, camera, channel, and output quantity
+
+    In streaming mode, each output quantity is instead summarized by a
+    src.Sketch, which is updated as each realization is stored
+
+    Args:
+    exp (src.Experiment): Experiment object that defines the telescopes,
+    cameras, and channels
+    nexp (int): number of experiment realizations
+    nobs (int): number of sky realizations per experiment realization
+    ndet (int): number of detector realizations per experiment realization
+    rank_err (float): normalized rank error of the percentiles in
+    streaming mode. Defaults to None, which stores every value
+
+    Attributes:
+    sens (list): sensitivity arrays with shape (nsens, nexp * nobs * ndet),
+    indexed as [tel][cam][ch]. In streaming mode, lists of nsens sketches
+    opt_pow (list): optical power arrays with shape
+    (nopt, nelem, nexp * nobs * ndet), indexed as [tel][cam][ch].
+    In streaming mode, nopt lists of nelem sketches
+    filled (np.ndarray): whether each experiment realization is stored
+    streaming (bool): whether outputs are summarized by sketches
+    """
+    # Number of sensitivity outputs and optical power outputs per channel
+    nsens = 15
+    nopt = 4
+
+    def __init__(self, exp, nexp, nobs, ndet, rank_err=None):
+        # Store passed parameters
+        self._nexp = nexp
+        self._nval = nobs * ndet
+        self.streaming = rank_err is not None
+        if self.streaming:
+            self._cap = sk.Sketch.capacity(rank_err, nexp * self._nval)
+
+        self.sens = [[[self._alloc_sens()
+                       for ch in cam.chs.values()]
+                      for cam in tel.cams.values()]
+                     for tel in exp.tels.values()]
+        # The number of elements is known once a channel is evaluated
+        self.opt_pow = [[[None for ch in cam.chs.values()]
+                         for cam in tel.cams.values()]
+                        for tel in exp.tels.values()]
+        self.filled = np.zeros(nexp, dtype=bool)
+
+    # ***** Public Methods *****
+    def store(self, n, sens, opt_pow=None):
+        """
+        Store the outputs of experiment realization 'n'
+
+        Args:
+        n (int): experiment realization index
+        sens (list): sensitivity arrays with shape (nsens, nobs * ndet),
+        indexed as [tel][cam][ch]
+        opt_pow (list): optical power arrays with shape
+        (nopt, nelem, nobs * ndet), indexed as [tel][cam][ch].
+        Defaults to None, which stores no optical powers
+        """
+        sl = self._slice(n)
+        for i, j, k in self.inds():
+            if self.streaming:
+                for sketch, vals in zip(self.sens[i][j][k], sens[i][j][k]):
+                    sketch.update(vals)
+            else:
+                self.sens[i][j][k][:, sl] = sens[i][j][k]
+            if opt_pow is None:
+                continue
+            opt = np.asarray(opt_pow[i][j][k], dtype=np.float64)
+            if self.opt_pow[i][j][k] is None:
+                self.opt_pow[i][j][k] = self._alloc_opt(opt.shape[1])
+            if self.streaming:
+                for sketches, vals in zip(self.opt_pow[i][j][k], opt):
+                    for sketch, val in zip(sketches, vals):
+                        sketch.update(val)
+            else:
+                self.opt_pow[i][j][k][..., sl] = opt
+        self.filled[n] = True
+        return
+
+    def pack(self):
+        """ Pack the sketches of streaming mode into a dict of arrays """
+        arrs = {"filled": self.filled}
+        for c, (i, j, k) in enumerate(self.inds()):
+            for m, sketch in enumerate(self.sens[i][j][k]):
+                arrs["sens_%d_%d" % (c, m)] = sketch.to_array()
+            if self.opt_pow[i][j][k] is None:
+                continue
+            arrs["nelem_%d" % (c)] = len(self.opt_pow[i][j][k][0])
+            for m, sketches in enumerate(self.opt_pow[i][j][k]):
+                for e, sketch in enumerate(sketches):
+                    arrs["opt_%d_%d_%d" % (c, m, e)] = sketch.to_array()
+        return arrs
+
+    def merge_packed(self, arrs):
+        """
+        Merge sketches packed by pack() into the sketches of this object
+
+        Args:
+        arrs (dict): packed sketches
+        """
+        for c, (i, j, k) in enumerate(self.inds()):
+            for m, sketch in enumerate(self.sens[i][j][k]):
+                sketch.merge(sk.Sketch.from_array(arrs["sens_%d_%d" % (c, m)]))
+            if "nelem_%d" % (c) not in arrs:
+                continue
+            nelem = int(arrs["nelem_%d" % (c)])
+            if self.opt_pow[i][j][k] is None:
+                self.opt_pow[i][j][k] = self._alloc_opt(nelem)
+            for m, sketches in enumerate(self.opt_pow[i][j][k]):
+                for e, sketch in enumerate(sketches):
+                    sketch.merge(sk.Sketch.from_array(
+                        arrs["opt_%d_%d_%d" % (c, m, e)]))
+        self.filled |= np.asarray(arrs["filled"], dtype=bool)
+        return
+
+    def rank_err(self):
+        """ Largest normalized rank error bound of the stored sketches """
+        if not self.streaming:
+            return 0.
+        errs = [sketch.rank_err() for i, j, k in self.inds()
+                for sketch in self.sens[i][j][k]]
+        return max(errs + [0.])
+
+    def realization(self, n):
+        """
+        Views of the sensitivity and optical power arrays of experiment
+        realization 'n', each as a flat list over (tel, cam, ch).
+        Not available in streaming mode
+
+        Args:
+        n (int): experiment realization index
+        """
+        sl = self._slice(n)
+        return ([self.sens[i][j][k][:, sl] for i, j, k in self.inds()],
+                [self.opt_pow[i][j][k][..., sl] for i, j, k in self.inds()])
+
+    def inds(self):
+        """ (tel, cam, ch) index of every channel """
+        return [(i, j, k)
+                for i in range(len(self.sens))
+                for j in range(len(self.sens[i]))
+                for k in range(len(self.sens[i][j]))]
+
+    # ***** Helper Methods *****
+    def _alloc_sens(self):
+        """ Sensitivity storage for one channel """
+        if self.streaming:
+            return [sk.Sketch(self._cap) for m in range(self.nsens)]
+        return np.full((self.nsens, self._nexp * self._nval), np.nan)
+
+    def _alloc_opt(self, nelem):
+        """ Optical power storage for one channel with 'nelem' elements """
+        if self.streaming:
+            return [[sk.Sketch(self._cap) for e in range(nelem)]
+                    for m in range(self.nopt)]
+        return np.full((self.nopt, nelem, self._nexp * self._nval), np.nan)
+
+    def _slice(self, n):
+        """ Output columns of experiment realization 'n' """
+        return slice(n * self._nval, (n + 1) * self._nval)
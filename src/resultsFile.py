@@ -0,0 +1,193 @@
+# Built-in modules
+import numpy as np
+import json as js
+import os
+
+
+class ResultsFile:
+    """
+    ResultsFile object writes every realization of every output to one
+    binary file in the experiment directory, either 'results.hdf5' or
+    'results.npz', so that they can be loaded without parsing the text
+    outputs
+
+    Each channel is stored under 'telescope/camera/band_id'. Its
+    sensitivity outputs are datasets with shape (nexp, nobs, ndet),
+    and its optical powers are datasets with shape (nelem, nexp, nobs, ndet)
+    under 'optical_power', all in the units of the text outputs. In the
+    HDF5 file, datasets are chunked and compressed, and units and input
+    parameters are stored as attributes. In the NPZ file, the attributes
+    of each group are stored as a JSON string under '<group>/attrs'
+
+    Args:
+    sim (src.Simulation): Simulation object
+
+    Attributes:
+    fmts (list): allowed values of the 'Results File' simulation input
+    """
+    fmts = ["NA", "HDF5", "NPZ"]
+
+    def __init__(self, sim):
+        # Store passed parameters
+        self._sim = sim
+        self._log = self._sim.log
+        self._units = self._sim.output_units
+
+        # Output labels, in the order of the sensitivity outputs
+        self._labels = [
+            "Optical Throughput", "Optical Power",
+            "Telescope Temp", "Sky Temp",
+            "Photon NEP", "Bolometer NEP",
+            "Readout NEP", "Detector NEP",
+            "Detector NET_CMB", "Detector NET_RJ",
+            "Array NET_CMB", "Array NET_RJ",
+            "Correlation Factor",
+            "CMB Map Depth", "RJ Map Depth"]
+        # Optical power outputs and their units
+        self._opt_keys = ["pow_sky", "pow_det", "eff", "cum_eff"]
+        self._opt_labels = [
+            "Power from Sky", "Power to Detector",
+            "Efficiency", "Cumulative Efficiency"]
+        self._opt_units = [
+            self._sim.std_params["POPT"].unit, self._sim.std_params[
+                "POPT"].unit, None, None]
+        # Target size of one compressed chunk [bytes]
+        self._chunk_bytes = 2**20
+
+    # ***** Public Methods *****
+    def write(self, fmt):
+        """
+        Write the results file
+
+        Args:
+        fmt (str): 'HDF5' or 'NPZ'
+        """
+        fmt = str(fmt).strip().upper()
+        if fmt not in self.fmts:
+            self._log.err(
+                "Results File '%s' in simulationInputs.txt not understood. "
+                "Use one of %s" % (fmt, ", ".join(self.fmts)))
+        if fmt == "NA":
+            return
+        results = self._sim.results
+        if results.streaming:
+            self._log.wrn(
+                "Not writing a results file when streaming outputs, as "
+                "individual realizations are not stored")
+            return
+        if fmt == "HDF5":
+            try:
+                import h5py  # noqa: F401
+            except ImportError:
+                self._log.wrn(
+                    "h5py not installed. Writing the results file as NPZ")
+                fmt = "NPZ"
+        groups = self._groups()
+        if fmt == "HDF5":
+            fname = os.path.join(self._sim.exp_dir, "results.hdf5")
+            self._write_hdf5(fname, groups)
+        else:
+            fname = os.path.join(self._sim.exp_dir, "results.npz")
+            self._write_npz(fname, groups)
+        self._log.out("Wrote every output realization to '%s'" % (fname))
+        return
+
+    # ***** Helper Methods *****
+    def _groups(self):
+        """
+        Return a list of (path, attrs, datasets) for the root and each
+        channel, where datasets is a list of (name, array, attrs)
+        """
+        sim = self._sim
+        results = sim.results
+        shape = (sim.param("nexp"), sim.param("nobs"), sim.param("ndet"))
+        attrs = {"Seed": str(sim.seed),
+                 "Outputs": list(self._units.keys())}
+        attrs.update(sim.input_params())
+        ret = [("", attrs, [])]
+        units = list(self._units.values())
+        tels = list(sim.exp.tels.values())
+        for i, j, k in results.inds():
+            tel = tels[i]
+            cam = list(tel.cams.values())[j]
+            ch = list(cam.chs.values())[k]
+            path = "/".join(
+                [tel.name, cam.param("cam_name"), str(ch.param("band_id"))])
+            attrs = {"Telescope": tel.name,
+                     "Camera": cam.param("cam_name"),
+                     "Channel": ch.param("ch_name"),
+                     "Num Det": int(ch.param("ndet"))}
+            attrs.update(self._med_params(ch))
+            sns = results.sens[i][j][k]
+            dsets = [(key, units[m].from_SI(sns[m]).reshape(shape),
+                      {"label": self._labels[m], "unit": units[m].name})
+                     for m, key in enumerate(self._units.keys())]
+            ret.append((path, attrs, dsets))
+            opt = results.opt_pow[i][j][k]
+            if opt is None:
+                continue
+            dsets = []
+            for m, key in enumerate(self._opt_keys):
+                unit = self._opt_units[m]
+                vals = opt[m] if unit is None else unit.from_SI(opt[m])
+                dsets.append((key, vals.reshape(-1, *shape), {
+                    "label": self._opt_labels[m],
+                    "unit": "NA" if unit is None else unit.name}))
+            ret.append((path + "/optical_power",
+                        {"Elements": list(ch.elem)}, dsets))
+        return ret
+
+    def _med_params(self, ch):
+        """ Median detector input parameters of a channel """
+        ret = {}
+        for param in ch.det_dict.values():
+            med = param.get_med()
+            if med is None or isinstance(med, str):
+                continue
+            unit = param.unit
+            if unit is None or unit.name == "NA":
+                ret[param.name] = np.asarray(med, dtype=float).tolist()
+            else:
+                ret["%s [%s]" % (param.name, unit.name)] = np.asarray(
+                    unit.from_SI(med), dtype=float).tolist()
+        return ret
+
+    def _write_hdf5(self, fname, groups):
+        """ Write chunked, compressed datasets to an HDF5 file """
+        import h5py as hp
+        with hp.File(fname, "w") as hf:
+            for path, attrs, dsets in groups:
+                grp = hf.require_group(path) if path else hf
+                for name, val in attrs.items():
+                    if isinstance(val, list) and len(val) and isinstance(
+                       val[0], str):
+                        val = np.array(val, dtype=hp.string_dtype())
+                    grp.attrs[name] = val
+                for name, arr, dattrs in dsets:
+                    dset = grp.create_dataset(
+                        name, data=arr, chunks=self._chunks(arr.shape),
+                        compression="gzip", shuffle=True)
+                    for key, val in dattrs.items():
+                        dset.attrs[key] = val
+        return
+
+    def _write_npz(self, fname, groups):
+        """ Write compressed arrays and JSON attributes to an NPZ file """
+        arrs = {}
+        for path, attrs, dsets in groups:
+            arrs["%s/attrs" % (path) if path else "attrs"] = np.array(
+                js.dumps(attrs))
+            for name, arr, dattrs in dsets:
+                key = "%s/%s" % (path, name) if path else name
+                arrs[key] = arr
+                arrs["%s/attrs" % (key)] = np.array(js.dumps(dattrs))
+        np.savez_compressed(fname, **arrs)
+        return
+
+    def _chunks(self, shape):
+        """ Chunks of whole experiment realizations of about 1 MB """
+        nrow = int(np.prod(shape[:-3], dtype=int))
+        nval = shape[-2] * shape[-1] * 8
+        nexp = int(max(1, min(
+            shape[-3], self._chunk_bytes // max(nrow * nval, 1))))
+        return tuple(shape[:-3]) + (nexp,) + tuple(shape[-2:])
@@ -18,9 +18,15 @@ class ScanStrategy:
         self.max_elev = 90.
 
     # ***** Public Methods *****
-    def elev_sample(self):
-        """ Sample telescope elevation """
-        samp = self._tel.elev_sample()
+    def elev_sample(self, rng=None):
+        """
+        Sample telescope elevation
+
+        Args:
+        rng (np.random.Generator): random generator to sample with.
+        Defaults to None, which uses the global numpy random state
+        """
+        samp = self._tel.elev_sample(rng)
         # Minimum allowed elevation = 20 deg
         if samp < self.min_elev:
             self._log.log(
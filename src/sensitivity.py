@@ -1,6 +1,5 @@
 # Built-in modules
 import numpy as np
-import functools as ft
 import copy as cp
 
 
@@ -13,23 +12,35 @@ class Sensitivity:
     sim (src.Simulation): parent Simulation object
 
     Attributes:
-    exp_dir (str): input experiment directory
-    senses (list): array of output sensitivities
-    opt_pos (list): array of output optical power arrays
+    stages (list): stages of the channel sensitivity calculation, each of
+    which only depends on the parameters and outputs of the earlier ones
 
     Parents:
     sim (src.Simulation): parent Simulation object
     exp (src.Experiment): parent Experiment object
     """
+    # Stages of the sensitivity calculation, in order
+    stages = ["spectra", "bolo", "read", "net", "array", "depth"]
+
     def __init__(self, sim):
         # Store passed parameters
         self.exp = sim.exp
         self._log = sim.log
         self._phys = sim.phys
         self._noise = sim.noise
+        self._tim = sim.timer
         self._corr = sim.param("corr")
         self._nobs = sim.param("nobs")
         self._ndet = sim.param("ndet")
+        # Intermediate arrays from which later stages are calculated
+        self._cache_names = [
+            "_tel_eff_arr", "_popt_arr", "_tel_rj_temp", "_sky_rj_temp",
+            "_NEP_ph_arr", "_NEP_ph_arr_corr", "_NEP_bolo_arr",
+            "_NEP_read_arr", "_NEP", "_NEP_corr", "_NET", "_NET_corr",
+            "_NET_RJ", "_NET_corr_RJ", "_NET_arr", "_NET_arr_RJ",
+            "_corr_deg"]
+        # SI values of swept parameters, with a leading sweep axis
+        self._sweep = {}
 
     # ***** Public methods *****
     def sensitivity(self, exp=None):
@@ -48,14 +59,67 @@ class Sensitivity:
 
     def opt_pow(self):
         """ Calculate optical power tables for parent Experiment object """
-        return [[[self._opt_pow(ch) for ch in cm.chs.values()]
+        return [[[self._timed_opt_pow(ch) for ch in cm.chs.values()]
                 for cm in tp.cams.values()]
                 for tp in self.exp.tels.values()]
 
-    def ch_sensitivity(self, ch):
+    def ch_sensitivity(self, ch, stage="spectra"):
         """
         Calculate channel sensitivity of a specific Channel object
 
+        The (obs, det, elem, freq) arrays stored in the channel are
+        processed all at once using broadcast array operations. The
+        intermediate arrays are cached on the channel, so that the
+        calculation can be restarted from a later stage when only the
+        parameters feeding that stage have changed
+
+        Args:
+        ch (src.Channel): Channel object
+        stage (str): stage from which to calculate, one of 'stages'.
+        Defaults to 'spectra', which calculates everything
+        """
+        self._calculate(ch, stage)
+        ch.sens_cache = {
+            name: getattr(self, name) for name in self._cache_names}
+        return self._sens_outputs()
+
+    def ch_sweep(self, ch, sweep, stage):
+        """
+        Calculate channel sensitivity for several values of parameters
+        that feed 'stage' or later at once, restarting from the
+        intermediate arrays cached by ch_sensitivity(). The swept values
+        are carried as a leading array axis, and are the same for every
+        detector and observation. Returns an array with shape
+        (nval, nsens, nobs * ndet)
+
+        Args:
+        ch (src.Channel): Channel object
+        sweep (dict): SI values of the swept parameters, each an array
+        with shape (nval,), keyed by telescope, camera, channel, or
+        detector parameter key
+        stage (str): earliest stage that the swept parameters feed
+        """
+        if self.stages.index(stage) == 0:
+            self._log.err(
+                "Cannot sweep parameters that change the spectra of "
+                "channel '%s'" % (ch.param("ch_name")))
+        nval = len(list(sweep.values())[0])
+        self._sweep = {
+            key: np.asarray(vals, dtype=np.float64).reshape(-1, 1, 1)
+            for key, vals in sweep.items()}
+        try:
+            self._calculate(ch, stage)
+        finally:
+            self._sweep = {}
+        return self._sens_outputs(nval)
+
+    def ch_sensitivity_ref(self, ch):
+        """
+        Calculate channel sensitivity of a specific Channel object
+        one (observation, detector) pair at a time. This is the reference
+        implementation against which auxil/check_sensitivity.py checks
+        ch_sensitivity()
+
         Args:
         ch (src.Channel): Channel object
         """
@@ -78,110 +142,346 @@ class Sensitivity:
         # Calculate map depth
         self._calc_map_depth(ch)
         self._calc_map_depth_RJ(ch)
-
-        # Return a list of parameter distributions
-        return [self._tel_eff_arr.flatten().tolist(),
-                self._popt_arr.flatten().tolist(),
-                self._tel_rj_temp.flatten().tolist(),
-                self._sky_rj_temp.flatten().tolist(),
-                self._NEP_ph_arr.flatten().tolist(),
-                self._NEP_bolo_arr.flatten().tolist(),
-                self._NEP_read_arr.flatten().tolist(),
-                self._NEP.flatten().tolist(),
-                self._NET.flatten().tolist(),
-                self._NET_RJ.flatten().tolist(),
-                self._NET_arr.flatten().tolist(),
-                self._NET_arr_RJ.flatten().tolist(),
-                self._corr_deg.flatten().tolist(),
-                self._map_depth.flatten().tolist(),
-                self._map_depth_RJ.flatten().tolist()]
+        return self._sens_outputs()
 
     # *** Helper methods ***
+    def _calculate(self, ch, stage):
+        """ Calculate the sensitivity stages from 'stage' onward """
+        start = self.stages.index(stage)
+        if start > 0:
+            if ch.sens_cache is None:
+                self._log.err(
+                    "Cannot restart the sensitivity calculation of channel "
+                    "'%s' from stage '%s' before it is calculated once"
+                    % (ch.param("ch_name"), stage))
+            self.__dict__.update(ch.sens_cache)
+        path = self._path(ch)
+        if start <= self.stages.index("spectra"):
+            with self._tim.time("sens_spectra", *path):
+                # Optical power spectrum for every element
+                pows = self._vec_pow_spec(ch)
+                # Calculate optical power
+                self._vec_popt(ch, pows)
+                self._vec_rj_temp(ch, pows)
+                # Calculate photon NEP
+                self._vec_photon_NEP(ch, pows)
+        if start <= self.stages.index("bolo"):
+            with self._tim.time("sens_bolo", *path):
+                self._vec_bolo_NEP(ch)
+        if start <= self.stages.index("read"):
+            with self._tim.time("sens_read", *path):
+                self._vec_read_NEP(ch)
+        if start <= self.stages.index("net"):
+            with self._tim.time("sens_net", *path):
+                self._calc_tot_NEP(ch)
+                # Calculate NET
+                self._vec_NET(ch)
+                self._vec_NET_RJ(ch)
+        if start <= self.stages.index("array"):
+            with self._tim.time("sens_array", *path):
+                # Calculate array NET
+                self._vec_NET_arr(ch)
+                # Calculate correlation degradation
+                self._vec_corr_deg(ch)
+        with self._tim.time("sens_depth", *path):
+            # Calculate map depth
+            self._vec_map_depth(ch)
+        return
+
+    def _path(self, ch):
+        """ Telescope, camera, and band ID of a channel, for timing """
+        return (ch.cam.tel.name, ch.cam.name, ch.band_id)
+
+    def _sens_outputs(self, nval=None):
+        """
+        Return the parameter distributions for a channel as an array
+        with shape (nparam, nobs * ndet), or (nval, nparam, nobs * ndet)
+        for 'nval' swept values
+        """
+        outs = [self._tel_eff_arr, self._popt_arr,
+                self._tel_rj_temp, self._sky_rj_temp,
+                self._NEP_ph_arr, self._NEP_bolo_arr,
+                self._NEP_read_arr, self._NEP,
+                self._NET, self._NET_RJ,
+                self._NET_arr, self._NET_arr_RJ,
+                self._corr_deg,
+                self._map_depth, self._map_depth_RJ]
+        if nval is None:
+            ret = np.empty((len(outs), self._nobs * self._ndet))
+            for i, out in enumerate(outs):
+                ret[i] = np.ravel(out)
+            return ret
+        ret = np.empty((nval, len(outs), self._nobs * self._ndet))
+        for i, out in enumerate(outs):
+            ret[:, i] = np.broadcast_to(
+                out, (nval, self._nobs, self._ndet)).reshape(nval, -1)
+        return ret
+
+    def _vec_pow_spec(self, ch):
+        """
+        Power spectra [W/Hz] that the elements deliver to the detector.
+        Returns the sky spectra, with shape (nobs, ndet, nsky, nfreq),
+        and the optics and detector spectra, which are the same for every
+        observation, with shape (ndet, ninst, nfreq)
+        """
+        sky_emis, sky_tran, sky_temp = [
+            ch.segments(quant)[0] for quant in ["emis", "tran", "temp"]]
+        inst_tran = self._inst(ch, "tran")
+        # Efficiency from each element to the detector, prod(tran[k+1:])
+        inst_eff = self._eff_det(inst_tran)
+        sky_eff = (self._eff_det(sky_tran) *
+                   np.prod(inst_tran, axis=1)[:, np.newaxis])
+        return [
+            self._phys.bb_pow_spec(ch.freqs, sky_temp, sky_emis * sky_eff),
+            self._phys.bb_pow_spec(
+                ch.freqs, self._inst(ch, "temp"),
+                self._inst(ch, "emis") * inst_eff)]
+
+    def _inst(self, ch, quant):
+        """
+        Optics and detector segments of a channel element array for each
+        detector, shape (ndet, ninst, nfreq)
+        """
+        opt, det = ch.segments(quant)[1:]
+        return np.concatenate((opt[0], det[0]), axis=1)
+
+    def _eff_det(self, tran):
+        """
+        Efficiency from each element to the end of the chain,
+        prod(tran[k+1:]), from a reverse cumulative product along axis -2
+        """
+        cum_tran = np.cumprod(tran[..., ::-1, :], axis=-2)[..., ::-1, :]
+        return np.concatenate(
+            (cum_tran[..., 1:, :], np.ones_like(cum_tran[..., :1, :])),
+            axis=-2)
+
+    def _tran_prod(self, ch, start=0):
+        """
+        Transmission from element 'start' through the detector,
+        shape (nobs, ndet, nfreq)
+        """
+        sky_tran = ch.segments("tran")[0]
+        nsky = sky_tran.shape[2]
+        return (np.prod(sky_tran[:, :, start:], axis=2) *
+                np.prod(self._inst(ch, "tran")[:, max(start - nsky, 0):],
+                        axis=1))
+
+    def _join(self, sky, inst):
+        """
+        Join sky values with shape (nobs, ndet, nsky) and optics and
+        detector values with shape (ndet, ninst) along the element axis
+        """
+        return np.concatenate((sky, np.broadcast_to(
+            inst, sky.shape[:2] + inst.shape[1:])), axis=2)
+
+    def _vec_popt(self, ch, pows):
+        """ Calculate optical power for a specific channel """
+        self._elem_pow = self._join(*[
+            np.trapz(pow_spec, ch.freqs, axis=-1) for pow_spec in pows])
+        self._popt_arr = np.sum(self._elem_pow, axis=-1)
+        return
+
+    def _vec_rj_temp(self, ch, pows):
+        """ Calculate telescope and sky RJ temps for a specific channel """
+        n_sky_elem = self._num_sky_elem(ch)
+        bw = self._det_param(ch, "bw")
+        # Telescope efficiency
+        self._tel_eff_arr = np.trapz(
+            self._tran_prod(ch, n_sky_elem-1), ch.freqs) / bw
+        # Telescope and sky temperatures
+        self._tel_rj_temp = self._phys.rj_temp(
+            np.sum(self._elem_pow[:, :, n_sky_elem:], axis=-1),
+            bw, self._tel_eff_arr)
+        self._sky_rj_temp = self._phys.rj_temp(
+            np.sum(self._elem_pow[:, :, :n_sky_elem], axis=-1),
+            bw, self._tel_eff_arr)
+        return
+
+    def _vec_photon_NEP(self, ch, pows):
+        """ Calculate photon NEP for a specific channel """
+        if self._corr:
+            # Correlation factors are shared by all detectors
+            self._NEP_ph_arr, self._NEP_ph_arr_corr = (
+                self._noise.photon_NEP_batch(
+                    pows, ch.freqs, ch.elem, (
+                        ch.param("pix_sz") /
+                        float(ch.cam.param("fnum") * self._phys.lamb(
+                            ch.param("bc"))))))
+        else:
+            # Both outputs are identical
+            self._NEP_ph_arr, self._NEP_ph_arr_corr = (
+                self._noise.photon_NEP_batch(pows, ch.freqs))
+        return
+
+    def _vec_bolo_NEP(self, ch):
+        """ Calculate bolometer NEP for a specific channel """
+        n = self._det_param(ch, "n")
+        tb = self._det_param(ch, "tb")
+        tc = self._det_param(ch, "tc")
+        psat = self._det_param(ch, "psat")
+        g = self._det_param(ch, "g")
+        flink = self._det_param(ch, "flink")
+        g = np.where(
+            np.isnan(g), np.where(
+                np.isnan(psat),
+                self._noise.G(
+                    self._det_param(ch, "psat_fact") * self._popt_arr,
+                    n, tb, tc),
+                self._noise.G(psat, n, tb, tc)), g)
+        flink = np.where(
+            np.isnan(flink), self._noise.Flink(n, tb, tc), flink)
+        self._NEP_bolo_arr = self._noise.bolo_NEP(flink, g, tc)
+        return
+
+    def _vec_read_NEP(self, ch):
+        """ Calculate readout NEP for a specific channel """
+        nei = self._det_param(ch, "nei")
+        bolo_r = self._det_param(ch, "bolo_r")
+        if np.any(np.isnan(nei)) or np.any(np.isnan(bolo_r)):
+            read_frac = self._det_param(ch, "read_frac")
+            self._NEP_read_arr = (
+                np.sqrt((1. + read_frac)**2 - 1.) *
+                np.sqrt(self._NEP_ph_arr**2 + self._NEP_bolo_arr**2))
+            return
+        psat = self._det_param(ch, "psat")
+        sfact = self._det_param(ch, "sfact")
+        sfact = np.where(np.isnan(sfact), 1., sfact)
+        p_bias = np.where(
+            np.isnan(psat),
+            (self._det_param(ch, "psat_fact") - 1.) * self._popt_arr,
+            psat - self._popt_arr)
+        saturated = ~np.isnan(psat) & (self._popt_arr >= psat)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            NEP_read = self._noise.read_NEP(p_bias, bolo_r, nei, sfact)
+        self._NEP_read_arr = np.where(saturated, 0., NEP_read)
+        return
+
+    def _vec_NET(self, ch):
+        """ Calculate NET for a specific channel """
+        dpdt_kern, _ = self._cmb_facts(ch)
+        dpdt = self._param(ch.cam, "opt_coup") * np.dot(
+            self._tran_prod(ch), dpdt_kern)
+        self._NET = self._noise.NET_from_dPdT(self._NEP, dpdt)
+        self._NET_corr = self._noise.NET_from_dPdT(self._NEP_corr, dpdt)
+        return
+
+    def _vec_NET_RJ(self, ch):
+        """ Calculate RJ NET for a specific channel """
+        _, factor = self._cmb_facts(ch)
+        self._NET_RJ = factor * self._NET
+        self._NET_corr_RJ = factor * self._NET_corr
+        return
+
+    def _cmb_facts(self, ch):
+        """
+        CMB dP/dT kernel and Trj/Tcmb factor on the channel frequencies,
+        cached on the channel until its band is re-stored
+        """
+        if ch.cmb_facts is None:
+            ch.cmb_facts = (self._noise.dPdT_kernel(ch.freqs),
+                            self._Trj_over_Tcmb(ch.freqs))
+        return ch.cmb_facts
+
+    def _vec_NET_arr(self, ch):
+        """ Calculate array NET and RJ array NET for a specific channel """
+        net_mgn = self._param(ch.cam.tel, "net_mgn")
+        ndet = self._param(ch, "ndet")
+        det_yield = self._param(ch, "yield")
+        self._NET_arr = self._noise.NET_arr(
+            self._NET_corr, ndet, det_yield) * net_mgn
+        self._NET_arr_RJ = self._noise.NET_arr(
+            self._NET_corr_RJ, ndet, det_yield) * net_mgn
+        return
+
+    def _vec_corr_deg(self, ch):
+        """ Calculate correlation factor for a specific channel """
+        self._corr_deg = self._NET_corr / self._NET
+        return
+
+    def _vec_map_depth(self, ch):
+        """ Calculate map depth and RJ map depth for a specific channel """
+        tel = ch.cam.tel
+        fsky = self._param(tel, "fsky")
+        tobs = self._param(tel, "tobs")
+        obs_eff = self._param(tel, "obs_eff")
+        self._map_depth = self._noise.map_depth(
+            self._NET_arr, fsky, tobs, obs_eff)
+        self._map_depth_RJ = self._noise.map_depth(
+            self._NET_arr_RJ, fsky, tobs, obs_eff)
+        return
+
+    def _param(self, obj, param):
+        """ Telescope, camera, or channel parameter, unless swept """
+        if param in self._sweep:
+            return self._sweep[param]
+        return obj.param(param)
+
+    def _det_param(self, ch, param):
+        """ Detector parameter for each detector, with NaN for 'NA' """
+        if param in self._sweep:
+            return self._sweep[param]
+        return np.array([
+            np.nan if 'NA' in str(det.param(param)) else det.param(param)
+            for det in ch.det_arr.dets]).astype(np.float)
+
+    def _timed_opt_pow(self, ch):
+        """ Calculate and time the optical power table for a channel """
+        with self._tim.time("opt_pow", *self._path(ch)):
+            return self._opt_pow(ch)
+
     def _opt_pow(self, ch):
         """ Calculate optical power table for a specific channel """
-        # Store passed parameters
-        self._pow_sky_side = []
-        self._pow_det_side = []
-        self._eff_elem = []
-        self._eff_det_side = []
-        for i in range(len(ch.elem)):  # nobs
-            pow_sky_side_1 = []
-            pow_det_side_1 = []
-            eff_elem_1 = []
-            eff_det_side_1 = []
-            for j in range(len(ch.elem[i])):  # ndet
-                window = np.array(ch.det_arr.dets[j].window)
-                bw = ch.det_arr.dets[j].param("bw")
-                pows = []
-                pow_sky_side_2 = []
-                pow_det_side_2 = []
-                eff_sky_side_2 = []
-                eff_elem_2 = []
-                eff_det_side_2 = []
-                # Store efficiency towards sky and towards detector
-                for k in range(len(ch.elem[i][j])):  # nelem
-                    # Store efficiency
-                    eff_elem_2.append(ch.tran[i][j][k])
-                    # Buffer the efficiency array
-                    eff_arr = np.vstack([ch.tran[i][j],
-                                         np.array([1. for f in ch.freqs])])
-                    # Efficiency towards the detector
-                    cum_eff_det = ft.reduce(lambda x, y: x*y, eff_arr[k+1:])
-                    eff_det_side_2.append(np.array(cum_eff_det))
-                    # Efficiency towards the sky
-                    if k == 0:
-                        # Zero elements sky side
-                        cum_eff_sky = [[0. for f in ch.freqs]]
-                    elif k == 1:
-                        # One element sky side
-                        cum_eff_sky = [[1. for f in ch.freqs],
-                                       [0. for f in ch.freqs]]
-                    else:
-                        cum_eff_sky = [ft.reduce(
-                            lambda x, y: x*y, eff_arr[m+1:k])
-                            if m < k-2 else eff_arr[m+1]
-                            for m in range(k-1)] + [[1. for f in ch.freqs],
-                                                    [0. for f in ch.freqs]]
-                    eff_sky_side_2.append(cum_eff_sky)
-                    pow = self._phys.bb_pow_spec(
-                        ch.freqs, ch.temp[i][j][k], ch.emis[i][j][k])
-                    pows.append(pow)
-                # Store band-averaged power from sky and power on detector
-                # and band-average the efficiencies
-                for k in range(len(ch.elem[i][j])):
-                    pow_out = np.trapz(pows[k] * eff_det_side_2[k], ch.freqs)
-                    pow_det_side_2.append(pow_out)
-                    if k == len(ch.elem[i][j]) - 1:
-                        eff_elem_2[k] = np.trapz(eff_elem_2[k], ch.freqs) / bw
-                    else:
-                        eff_elem_2[k] = (
-                            np.trapz(
-                                eff_elem_2[k] * eff_elem_2[-1], ch.freqs) / 
-                            np.trapz(eff_elem_2[-1], ch.freqs))
-                    eff_det_side_2[k] = (
-                        np.trapz(eff_det_side_2[k], ch.freqs) / bw)
-                    pow_in = sum([np.trapz(
-                        pows[m] * eff_sky_side_2[k][m] *
-                        window, ch.freqs)
-                        for m in range(k)])
-                    pow_sky_side_2.append(pow_in)
-                # Force the final efficiency to be 100%
-                eff_det_side_2[-1] = 1.
-                pow_sky_side_1.append(pow_sky_side_2)
-                pow_det_side_1.append(pow_det_side_2)
-                eff_elem_1.append(eff_elem_2)
-                eff_det_side_1.append(eff_det_side_2)
-            self._pow_sky_side.append(pow_sky_side_1)
-            self._pow_det_side.append(pow_det_side_1)
-            self._eff_elem.append(eff_elem_1)
-            self._eff_det_side.append(eff_det_side_1)
+        freqs = ch.freqs
+        bw = self._det_param(ch, "bw")
+        window = np.array(
+            [det.window for det in ch.det_arr.dets]).astype(np.float)
+        # Sky arrays are per (obs, det), optics and detector arrays per det
+        sky_emis, sky_tran, sky_temp = [
+            ch.segments(quant)[0] for quant in ["emis", "tran", "temp"]]
+        inst_tran = self._inst(ch, "tran")
+        # Power spectrum emitted by each element
+        sky_pows = self._phys.bb_pow_spec(freqs, sky_temp, sky_emis)
+        inst_pows = self._phys.bb_pow_spec(
+            freqs, self._inst(ch, "temp"), self._inst(ch, "emis"))
+        # Efficiency from each element to the detector, prod(tran[k+1:])
+        inst_eff = self._eff_det(inst_tran)
+        sky_eff = (self._eff_det(sky_tran) *
+                   np.prod(inst_tran, axis=1)[:, np.newaxis])
+        # Power from the sky side incident on each element,
+        # sum_{m<k} pows[m] * prod(tran[m+1:k]), accumulated in one pass
+        trans = ([sky_tran[:, :, k] for k in range(sky_tran.shape[2])] +
+                 [inst_tran[:, k] for k in range(inst_tran.shape[1])])
+        pows = ([sky_pows[:, :, k] for k in range(sky_pows.shape[2])] +
+                [inst_pows[:, k] for k in range(inst_pows.shape[1])])
+        pow_in = np.zeros(sky_pows.shape[:2] + (len(freqs),))
+        pow_sky_side = []
+        for k in range(len(pows)):
+            pow_sky_side.append(np.trapz(pow_in * window, freqs))
+            pow_in = pow_in * trans[k] + pows[k]
+        # Band-average the powers and efficiencies
+        self._pow_sky_side = np.stack(pow_sky_side, axis=2)
+        self._pow_det_side = self._join(
+            np.trapz(sky_pows * sky_eff, freqs),
+            np.trapz(inst_pows * inst_eff, freqs))
+        det_band = inst_tran[:, -1:]
+        det_band_int = np.trapz(det_band, freqs)
+        self._eff_elem = self._join(
+            np.trapz(sky_tran * det_band, freqs) / det_band_int,
+            np.trapz(inst_tran * det_band, freqs) / det_band_int)
+        self._eff_elem[:, :, -1] = (
+            np.trapz(inst_tran[:, -1], freqs) / bw)
+        self._eff_det_side = self._join(
+            np.trapz(sky_eff, freqs), np.trapz(inst_eff, freqs)) / (
+            bw[:, np.newaxis])
+        # Force the final efficiency to be 100%
+        self._eff_det_side[:, :, -1] = 1.
         # Build table of optical powers and efficiencies for each element
         return self._opt_table()
 
     def _calc_popt(self, ch):
         """ Calculate optical power for a specific channel """
         self._popt_arr = np.array([[self._popt(
-            ch.elem[i][j], ch.emis[i][j], ch.tran[i][j],
+            ch.elem, ch.emis[i][j], ch.tran[i][j],
             ch.temp[i][j], ch.freqs)
             for j in range(self._ndet)]
             for i in range(self._nobs)])
@@ -198,7 +498,7 @@ class Sensitivity:
             for i in range(self._nobs)])
         # Telescope temperature
         self._tel_rj_temp = np.array([[self._rj_temp(
-            ch.elem[i][j][n_sky_elem:],
+            ch.elem[n_sky_elem:],
             ch.emis[i][j][n_sky_elem:],
             ch.tran[i][j][n_sky_elem:],
             ch.temp[i][j][n_sky_elem:],
@@ -208,7 +508,7 @@ class Sensitivity:
             for i in range(self._nobs)])
         # Sky temperature
         self._sky_rj_temp = np.array([[self._rj_temp(
-            ch.elem[i][j][:n_sky_elem],
+            ch.elem[:n_sky_elem],
             ch.emis[i][j][:n_sky_elem],
             ch.tran[i][j],
             ch.temp[i][j][:n_sky_elem],
@@ -225,7 +525,7 @@ class Sensitivity:
         else:
             pass_ch = None
         NEP_ph_out = np.array([[self._photon_NEP(
-            ch.elem[i][j], ch.emis[i][j], ch.tran[i][j],
+            ch.elem, ch.emis[i][j], ch.tran[i][j],
             ch.temp[i][j], ch.freqs, pass_ch)
             for j in range(self._ndet)]
             for i in range(self._nobs)])
@@ -448,17 +748,16 @@ class Sensitivity:
         return np.array(out_tran).astype(np.float)
 
     def _opt_table(self):
-        """ Calculate optial power table """
+        """
+        Calculate optial power table, an array with shape
+        (4, nelem, nobs * ndet)
+        """
         shape = np.shape(self._pow_sky_side)
         new_shape = (shape[0] * shape[1], shape[2])
-        pow_sky_side = np.transpose(np.reshape(self._pow_sky_side, new_shape))
-        pow_det_side = np.transpose(np.reshape(self._pow_det_side, new_shape))
-        eff_elem = np.transpose(np.reshape(self._eff_elem, new_shape))
-        eff_det_side = np.transpose(np.reshape(self._eff_det_side, new_shape))
-        return [pow_sky_side,
-                pow_det_side,
-                eff_elem,
-                eff_det_side]
+        return np.array([
+            np.transpose(np.reshape(arr, new_shape))
+            for arr in [self._pow_sky_side, self._pow_det_side,
+                        self._eff_elem, self._eff_det_side]])
 
     def _num_sky_elem(self, ch):
         """ Discern the number of sky optical elements """
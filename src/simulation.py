@@ -1,11 +1,14 @@
 # Built-in modules
 import datetime as dt
+import multiprocessing as mp
 import numpy as np
 import sys as sy
+import time as tm
 import glob as gb
 import os
 
 # BoloCalc modules
+import src.atmosphere as at
 import src.experiment as ex
 import src.display as dp
 import src.log as lg
@@ -14,10 +17,12 @@ import src.parameter as pr
 import src.standardParam as sp
 import src.unit as un
 import src.physics as ph
+import src.results as rs
 import src.noise as ns
 # import src.profile as pf
 import src.sensitivity as sn
-import src.vary as vr
+import src.snapshot as ss
+import src.timer as tr
 
 
 class Simulation:
@@ -32,29 +37,34 @@ class Simulation:
 
     Attributes:
     exp_dir (str): input experiment directory
-    senses (list): array of output sensitivities
-    opt_pos (list): array of output optical power arrays
+    seed (int): entropy from which all random streams are seeded
+    atm_file (str): HDF5 atmosphere file, or None when no telescope
+    observes through it
+    results (src.Results): output sensitivities and optical powers
 
     Children:
     log (src.Log): Log object
     load (src.Load): Load object
     phys (src.Physics): Physics object
     noise (src.Noise): Noise object
+    atm (src.Atmosphere): Atmosphere object
     exp (src.Experiment): Experiment object
     sns (src.Sensitivity): Sensitivity object
     dsp (src.Display): Display object
+    rfile (src.ResultsFile): ResultsFile object, or None until a results
+    file is written
+    snap (src.Snapshot): Snapshot object
+    timer (src.Timer): Timer object
     """
     def __init__(self, log_file, sim_file, exp_dir):
+        start = tm.time()
         # Store experiment input file
         self.exp_dir = exp_dir
         self._sim_file = sim_file
 
         # Set up logging
         self.log = lg.Log(log_file)
-
-        # Latest atm file
-        self._atm_log = 'atm_log.txt'
-        self._check_atm()
+        self.timer = tr.Timer(self.log)
 
         # Store standard parameter values
         self._store_standard_params()
@@ -65,32 +75,85 @@ class Simulation:
         self.load = ld.Loader(self)
         self.phys = ph.Physics()
         self.noise = ns.Noise(self.phys)
+        self.atm = at.Atmosphere(self.log)
         # Store parameter values
         self._store_param_dict()
+        self._store_seed()
+        self.snap = ss.Snapshot(self)
         # Length of status bar
         self._bar_len = 100
 
         # Generate simulation objects
         self.log.log("Generating Experiment object")
-        self.exp = ex.Experiment(self)
+        with self.timer.time("load"):
+            self.exp = ex.Experiment(self)
+        # Only locate the latest atm file when a telescope needs it
+        self.atm_file = None
+        if any([tel.needs_atm() for tel in self.exp.tels.values()]):
+            self.locate_atm()
         self.log.log("Generating Sensitivity object")
         self.sns = sn.Sensitivity(self)
         self.log.log("Generating Display object")
         self.dsp = dp.Display(self)
+        self.rfile = None
 
-        # Output arrays
-        self.senses = []
-        self.opt_pows = []
+        # Output arrays, or sketches of them when streaming
+        rank_err = None
+        if self.param("stream"):
+            rank_err = self.param("qerr")
+            self.log.log(
+                "Streaming outputs into quantile sketches with rank error "
+                "%.2g" % (rank_err))
+        self.results = rs.Results(
+            self.exp, self.param("nexp"), self.param("nobs"),
+            self.param("ndet"), rank_err)
+        self.log.log(
+            "Simulation set up in %.3f seconds" % (tm.time() - start))
 
     # **** Public Methods ****
     # @pf.profiler
-    def simulate(self):
-        """ Run simulation """
-        self._evaluate()
+    def simulate(self, jobs=1, shard=None):
+        """
+        Run simulation
+
+        Args:
+        jobs (int): number of worker processes over which to spread the
+        experiment realizations. Defaults to 1, which runs serially
+        shard (tuple): (i, N) to only simulate realizations i, i+N, ...
+        and save them to a shard file for merge_shards(). Defaults to None,
+        which simulates all realizations and displays the outputs
+        """
+        if shard is None:
+            self._evaluate(jobs)
+            self._display()
+            return
+        shard_ind, nshard = shard
+        if nshard < 1 or shard_ind < 0 or shard_ind >= nshard:
+            self.log.err(
+                "Invalid shard %d/%d. Shard index must be between "
+                "0 and %d" % (shard_ind, nshard, nshard - 1))
+        reals = list(range(shard_ind, self.param("nexp"), nshard))
+        if len(reals) == 0:
+            self.log.err(
+                "Shard %d/%d contains no experiment realizations. Use at "
+                "most %d shards" % (shard_ind, nshard, self.param("nexp")))
+        self._evaluate(jobs, reals)
+        self._save_shard(shard_ind, nshard, reals)
+        return
+
+    def merge_shards(self):
+        """
+        Merge the shard files written by simulate(shard=(i, N)) for all i
+        and display the outputs
+        """
+        self._load_shards()
+        # Leave the experiment in its final realization, as when serial
+        self.seed_exp(self.exp, self.param("nexp") - 1)
+        self.exp.evaluate()
         self._display()
         return
 
-    def vary_simulate(self, param_file, vary_name, vary_tog):
+    def vary_simulate(self, param_file, vary_name, vary_tog, jobs=1):
         """
         Run parameter vary simulation
 
@@ -98,11 +161,57 @@ class Simulation:
         param_file (str): file that contains the parameters to be varied
         vary_name (str): name of the vary output directory
         vary_tog (bool): whether or not to vary the parameter arrays together
+        jobs (int): number of worker processes over which to spread the
+        parameter sets. Defaults to 1, which runs serially
         """
+        # Only parameter vary runs need the Vary module
+        import src.vary as vr
         vary = vr.Vary(self, param_file, vary_name, vary_tog)
-        vary.vary()
+        vary.vary(jobs)
         return
 
+    def locate_atm(self):
+        """
+        Locate the latest HDF5 atmosphere file, check whether it is out
+        of date, and pass it to the Atmosphere object
+        """
+        self._check_atm()
+        self.atm.set_file(self.atm_file)
+        return
+
+    def seed_exp(self, exp, n, i=None):
+        """
+        Seed experiment realization 'n', such that it and each of its
+        telescopes, cameras, channels, and detectors sample from
+        independent random streams that only depend on the seed and 'n'
+
+        Args:
+        exp (src.Experiment): experiment to seed
+        n (int): experiment realization index
+        i (int): parameter set index when varying parameters. Defaults to
+        None, which seeds the fiducial realization
+        """
+        if i is None:
+            key = (n,)
+        else:
+            # Realizations only use spawn keys that start below nexp
+            key = (self.param("nexp") + n, i)
+        exp.set_seed(np.random.SeedSequence(self.seed, spawn_key=key))
+        return
+
+    def input_params(self):
+        """
+        Return the simulation input values as strings in their input
+        units, keyed by parameter name
+        """
+        ret = {}
+        for k, param in self._param_dict.items():
+            val = self.param(k)
+            if param.unit is not None and not isinstance(val, str):
+                val = param.unit.from_SI(val)
+            ret[param.name] = str(val)
+        return ret
+
     def param(self, param):
         """
         Return parameter from param_dict
@@ -139,6 +248,24 @@ class Simulation:
             "CORRELATIONS": sp.StandardParam(
                 "Correlations", None,
                 None, None, bool),
+            "INTERPOLATEATM": sp.StandardParam(
+                "Interpolate ATM", None,
+                None, None, bool),
+            "SEED": sp.StandardParam(
+                "Seed", un.Unit("NA"),
+                0, np.inf, int),
+            "STREAMOUTPUTS": sp.StandardParam(
+                "Stream Outputs", None,
+                None, None, bool),
+            "QUANTILEERROR": sp.StandardParam(
+                "Quantile Error", un.Unit("NA"),
+                0.0, 1.0, float),
+            "RESULTSFILE": sp.StandardParam(
+                "Results File", un.Unit("NA"),
+                None, None, str),
+            "SNAPSHOTCACHE": sp.StandardParam(
+                "Snapshot Cache", None,
+                None, None, bool),
             "PERCENTILE": sp.StandardParam(
                 "Percentile", None,
                 None, None, list),
@@ -177,22 +304,27 @@ class Simulation:
                 0.0, 8.0, float),
             "OBSERVATIONTIME": sp.StandardParam(
                 "Observation Time", un.Unit("yr"),
-                func_min, np.inf, float),
+                func_min, np.inf, float,
+                stage="depth"),
             "SKYFRACTION": sp.StandardParam(
                 "Sky Fraction", un.Unit("NA"),
-                func_min, 1.0, float),
+                func_min, 1.0, float,
+                stage="depth"),
             "OBSERVATIONEFFICIENCY": sp.StandardParam(
                 "Observation Efficiency", un.Unit("NA"),
-                func_min, 1.0, float),
+                func_min, 1.0, float,
+                stage="depth"),
             "NETMARGIN": sp.StandardParam(
                 "NET Margin", un.Unit("NA"),
-                func_min, np.inf, float),
+                func_min, np.inf, float,
+                stage="array"),
             "BORESIGHTELEVATION": sp.StandardParam(
                 "Boresight Elevation", un.Unit("deg"),
                 -40.0, 40.0, float),
             "OPTICALCOUPLING": sp.StandardParam(
                 "Optical Coupling", un.Unit("NA"),
-                func_min, 1.0, float),
+                func_min, 1.0, float,
+                stage="net"),
             "FNUMBER": sp.StandardParam(
                 "F Number", un.Unit("NA"),
                 func_min, np.inf, float),
@@ -213,13 +345,16 @@ class Simulation:
                 func_min, np.inf, float),
             "NUMDETPERWAFER": sp.StandardParam(
                 "Num Det per Wafer", un.Unit("NA"),
-                0.0, np.inf, float),
+                0.0, np.inf, float,
+                stage="array"),
             "NUMWAFPEROT": sp.StandardParam(
                 "Num Waf per OT", un.Unit("NA"),
-                0.0, np.inf, float),
+                0.0, np.inf, float,
+                stage="array"),
             "NUMOT": sp.StandardParam(
                 "Num OT", un.Unit("NA"),
-                0.0, np.inf, float),
+                0.0, np.inf, float,
+                stage="array"),
             "WAISTFACTOR": sp.StandardParam(
                 "Waist Factor", un.Unit("NA"),
                 2.0, np.inf, float),
@@ -228,40 +363,52 @@ class Simulation:
                 func_min, 1.0, float),
             "PSAT": sp.StandardParam(
                 "Psat", un.Unit("pW"),
-                func_min, np.inf, float),
+                func_min, np.inf, float,
+                stage="bolo"),
             "PSATFACTOR": sp.StandardParam(
                 "Psat Factor", un.Unit("NA"),
-                func_min, np.inf, float),
+                func_min, np.inf, float,
+                stage="bolo"),
             "CARRIERINDEX": sp.StandardParam(
                 "Carrier Index", un.Unit("NA"),
-                func_min, np.inf, float),
+                func_min, np.inf, float,
+                stage="bolo"),
             "TC": sp.StandardParam(
                 "Tc", un.Unit("K"),
-                func_min, np.inf, float),
+                func_min, np.inf, float,
+                stage="bolo"),
             "TCFRACTION": sp.StandardParam(
                 "Tc Fraction", un.Unit("NA"),
-                func_min, np.inf, float),
+                func_min, np.inf, float,
+                stage="bolo"),
             "FLINK": sp.StandardParam(
                 "Flink", un.Unit("NA"),
-                func_min, np.inf, float),
+                func_min, np.inf, float,
+                stage="bolo"),
             "G": sp.StandardParam(
                 "G", un.Unit("pW"),
-                func_min, np.inf, float),
+                func_min, np.inf, float,
+                stage="bolo"),
             "YIELD": sp.StandardParam(
                 "Yield", un.Unit("NA"),
-                func_min, 1.000, float),
+                func_min, 1.000, float,
+                stage="array"),
             "SQUIDNEI": sp.StandardParam(
                 "SQUID NEI", un.Unit("pA/rtHz"),
-                func_min, np.inf, float),
+                func_min, np.inf, float,
+                stage="read"),
             "BOLORESISTANCE": sp.StandardParam(
                 "Bolo Resistance", un.Unit("Ohm"),
-                func_min, np.inf, float),
+                func_min, np.inf, float,
+                stage="read"),
             "READNOISEFRAC": sp.StandardParam(
                 "Read Noise Frac", un.Unit("NA"),
-                0.0, np.inf, float),
+                0.0, np.inf, float,
+                stage="read"),
             "RESPFACTOR": sp.StandardParam(
                 "Resp Factor", un.Unit("NA"),
-                func_min, np.inf, float),
+                func_min, np.inf, float,
+                stage="read"),
             "ELEMENT": sp.StandardParam(
                 "Element", un.Unit("NA"),
                 None, None, str),
@@ -378,6 +525,68 @@ class Simulation:
             self.log.err(
                 "Neither 'Percentile' not 'Percentile Lo' and 'Percentile Hi " 
                 "were found in 'simulationInputs.txt")
+        # "Interpolate ATM" was added later, so it is optional for backwards
+        # compatibility
+        if self._input_param_exists("Interpolate ATM"):
+            self._param_dict.update(
+                {"atm_interp": self._store_param("Interpolate ATM")})
+        else:
+            self._param_dict.update({"atm_interp": pr.Parameter(
+                self.log, "False", std_param=self.std_params[
+                    "INTERPOLATEATM"])})
+        # "Seed" was added later, so it is optional for backwards
+        # compatibility. "NA" draws a new random seed
+        if self._input_param_exists("Seed") and str(
+                self._retrieve_input_param("Seed")).strip() != "NA":
+            self._param_dict.update({"seed": self._store_param("Seed")})
+        else:
+            self._param_dict.update({"seed": pr.Parameter(
+                self.log, "NA", name="Seed")})
+        # "Stream Outputs" and "Quantile Error" were added later, so they
+        # are optional for backwards compatibility
+        if self._input_param_exists("Stream Outputs"):
+            self._param_dict.update(
+                {"stream": self._store_param("Stream Outputs")})
+        else:
+            self._param_dict.update({"stream": pr.Parameter(
+                self.log, "False", std_param=self.std_params[
+                    "STREAMOUTPUTS"])})
+        if self._input_param_exists("Quantile Error"):
+            self._param_dict.update(
+                {"qerr": self._store_param("Quantile Error")})
+        else:
+            self._param_dict.update({"qerr": pr.Parameter(
+                self.log, "0.01", std_param=self.std_params[
+                    "QUANTILEERROR"])})
+        # "Results File" was added later, so it is optional for backwards
+        # compatibility
+        if self._input_param_exists("Results File"):
+            self._param_dict.update(
+                {"rfile": self._store_param("Results File")})
+        else:
+            self._param_dict.update({"rfile": pr.Parameter(
+                self.log, "NA", std_param=self.std_params["RESULTSFILE"])})
+        # "Snapshot Cache" was added later, so it is optional for backwards
+        # compatibility, and off unless enabled
+        if self._input_param_exists("Snapshot Cache"):
+            self._param_dict.update(
+                {"snap": self._store_param("Snapshot Cache")})
+        else:
+            self._param_dict.update({"snap": pr.Parameter(
+                self.log, "False", std_param=self.std_params[
+                    "SNAPSHOTCACHE"])})
+        return
+
+    def _store_seed(self):
+        """ Store the entropy from which all random streams are seeded """
+        seed = self.param("seed")
+        if str(seed).strip().upper() == "NA":
+            self.seed = np.random.SeedSequence().entropy
+            self.log.log(
+                "No 'Seed' defined in simulationInputs.txt. Using "
+                "seed %d, which reproduces this simulation" % (self.seed))
+        else:
+            self.seed = int(seed)
         return
 
     def _input_param_exists(self, name):
@@ -408,36 +617,202 @@ class Simulation:
                 "Passed parameter in simulationInputs.txt '%s' not "
                 "recognized in _store_param()" % (name))
 
-    def _evaluate(self):
-        """ Evaluate experiment """
-        tot_sims = self.param("nexp") * self.param("ndet") * self.param("nobs")
+    def _evaluate(self, jobs=1, reals=None):
+        """
+        Evaluate experiment
+
+        Args:
+        jobs (int): number of worker processes. Defaults to 1
+        reals (list): experiment realization indices to evaluate.
+        Defaults to None, which evaluates all of them
+        """
+        if reals is None:
+            reals = list(range(self.param("nexp")))
+        tot_sims = len(reals) * self.param("ndet") * self.param("nobs")
         self.log.out((
                 "Simulting %d experiment realizations each with "
                 "%d detector realizations and %d sky realizations. "
                 "Total sims = %d"
-                % (self.param("nexp"), self.param("ndet"),
+                % (len(reals), self.param("ndet"),
                    self.param("nobs"), tot_sims)))
-        for n in range(self.param("nexp")):
+        if jobs > 1 and len(reals) > 1:
+            if "fork" in mp.get_all_start_methods():
+                self._evaluate_parallel(jobs, reals)
+                self._done()
+                return
+            self.log.wrn(
+                "Process forking is not available on this platform. "
+                "Simulating the %d experiment realizations serially"
+                % (len(reals)))
+        for i, n in enumerate(reals):
+            self._status(i, len(reals))
             self._evaluate_exp(n)
+        self.atm.log_stats()
         self._done()
         return
 
     def _evaluate_exp(self, n):
         """ Evaluate and calculate sensitivity for a generated experiment """
-        self._status(n)
+        self.seed_exp(self.exp, n)
+        self.exp.evaluate()
+        self.results.store(n, self.sns.sensitivity(), self.sns.opt_pow())
+        self.timer.nreal += 1
+        return
+
+    def _evaluate_parallel(self, jobs, reals):
+        """
+        Evaluate experiment realizations in 'jobs' forked worker processes.
+        Workers inherit the loaded experiment copy-on-write, and each
+        realization is seeded by its index, so the output does not depend
+        on how realizations are scheduled
+        """
+        self.log.log(
+            "Simulating %d experiment realizations using %d processes"
+            % (len(reals), jobs))
+        # Flush buffered messages so that they are not duplicated by workers
+        self.log.flush()
+        # Set aside timings so that they are not duplicated by workers
+        times = self.timer.pop()
+        global _pool_sim
+        _pool_sim = self
+        ctx = mp.get_context("fork")
+        with ctx.Pool(processes=min(jobs, len(reals))) as pool:
+            for i, (n, (sens, opt_pow, recs)) in enumerate(zip(
+                    reals, pool.imap(_pool_evaluate, reals))):
+                self._status(i, len(reals))
+                self.results.store(n, sens, opt_pow)
+                self.timer.merge(recs)
+                self.timer.nreal += 1
+        self.timer.merge(times)
+        _pool_sim = None
+        # Leave the experiment in its final realization, as when serial
+        self.seed_exp(self.exp, reals[-1])
         self.exp.evaluate()
-        self.senses.append(self.sns.sensitivity())
-        self.opt_pows.append(self.sns.opt_pow())
+        return
+
+    def _evaluate_realization(self, n):
+        """ Evaluate experiment realization 'n' """
+        self.seed_exp(self.exp, n)
+        self.exp.evaluate()
+        ret = (self.sns.sensitivity(), self.sns.opt_pow(), self.timer.pop())
+        # Cache statistics of this worker process
+        self.atm.log_stats()
+        self.log.flush()
+        return ret
+
+    def _shard_file(self, shard, nshard):
+        """ Partial-results file for shard 'shard' of 'nshard' """
+        return os.path.join(
+            self.exp_dir, "shard_%03d_of_%03d.npz" % (shard, nshard))
+
+    def _save_shard(self, shard, nshard, reals):
+        """ Save the sensitivities and optical powers of a shard """
+        if self.results.streaming:
+            # Sketches of the shard's realizations
+            arrs = self.results.pack()
+        else:
+            # Outputs of each realization, flattened over (tel, cam, ch)
+            senses, opt_pows = zip(
+                *[self.results.realization(n) for n in reals])
+            arrs = {"opt_pow_%d" % (i): np.array(
+                        [opt_pow[i] for opt_pow in opt_pows])
+                    for i in range(len(self.results.inds()))}
+            arrs["senses"] = np.array(senses)
+        shard_file = self._shard_file(shard, nshard)
+        np.savez_compressed(
+            shard_file, reals=np.array(reals),
+            shard=shard, nshard=nshard, seed=str(self.seed),
+            nexp=self.param("nexp"), nobs=self.param("nobs"),
+            ndet=self.param("ndet"), stream=self.results.streaming, **arrs)
+        self.log.out(
+            "Wrote %d experiment realizations to '%s'"
+            % (len(reals), shard_file))
+        return
+
+    def _load_shards(self):
+        """ Load all shard files and store their outputs in order """
+        shard_files = sorted(gb.glob(os.path.join(
+            self.exp_dir, "shard_*_of_*.npz")))
+        if len(shard_files) == 0:
+            self.log.err(
+                "No shard files found in '%s' to merge" % (self.exp_dir))
+        reals = []
+        senses = []
+        opt_pows = []
+        seeds = []
+        nshards = []
+        for shard_file in shard_files:
+            with np.load(shard_file) as data:
+                for name in ["nexp", "nobs", "ndet"]:
+                    if int(data[name]) != self.param(name):
+                        self.log.err(
+                            "Shard file '%s' was run with %s = %d, but "
+                            "simulationInputs.txt defines %s = %d"
+                            % (shard_file, name, int(data[name]),
+                               name, self.param(name)))
+                stream = "stream" in data.files and bool(data["stream"])
+                if stream != self.results.streaming:
+                    self.log.err(
+                        "Shard file '%s' was run with Stream Outputs = %s, "
+                        "but simulationInputs.txt defines Stream Outputs "
+                        "= %s" % (shard_file, stream,
+                                  self.results.streaming))
+                nshards.append(int(data["nshard"]))
+                seeds.append(str(data["seed"]))
+                reals += data["reals"].tolist()
+                if stream:
+                    self.results.merge_packed(data)
+                    continue
+                senses += list(data["senses"])
+                nchs = len(data["senses"][0])
+                opt_pows += list(zip(*[
+                    data["opt_pow_%d" % (i)] for i in range(nchs)]))
+        if len(set(nshards)) != 1 or len(shard_files) != nshards[0]:
+            self.log.err(
+                "Found %d shard files in '%s', but they do not make up one "
+                "complete set of shards" % (len(shard_files), self.exp_dir))
+        if sorted(reals) != list(range(self.param("nexp"))):
+            self.log.err(
+                "Shard files in '%s' do not contain experiment realizations "
+                "0 through %d exactly once"
+                % (self.exp_dir, self.param("nexp") - 1))
+        if len(set(seeds)) != 1:
+            self.log.wrn(
+                "Shard files in '%s' were run with different seeds"
+                % (self.exp_dir))
+        # Rebuild the telescope/camera/channel nesting
+        for n, sens, opt_pow in zip(reals, senses, opt_pows):
+            sens = iter(sens)
+            opt_pow = iter(opt_pow)
+            self.results.store(
+                n, [[[next(sens) for ch in cam.chs.values()]
+                     for cam in tel.cams.values()]
+                    for tel in self.exp.tels.values()],
+                [[[next(opt_pow) for ch in cam.chs.values()]
+                  for cam in tel.cams.values()]
+                 for tel in self.exp.tels.values()])
+        self.log.out(
+            "Merged %d experiment realizations from %d shard files"
+            % (len(reals), len(shard_files)))
         return
 
     def _display(self):
         """ Display sensitivity output """
-        self.dsp.display()
+        with self.timer.time("display"):
+            self.dsp.display()
+        # Only runs that write a results file need the ResultsFile module
+        if str(self.param("rfile")).strip().upper() != "NA":
+            import src.resultsFile as rf
+            self.rfile = rf.ResultsFile(self)
+            with self.timer.time("results_file"):
+                self.rfile.write(self.param("rfile"))
         return
 
-    def _status(self, rel):
-        """ Print status bar for realization 'rel' """
-        frac = float(rel) / float(self.param("nexp"))
+    def _status(self, rel, tot=None):
+        """ Print status bar for realization 'rel' out of 'tot' """
+        if tot is None:
+            tot = self.param("nexp")
+        frac = float(rel) / float(tot)
         sy.stdout.write('\r')
         sy.stdout.write(
             "[%-*s] %02.1f%%" % (int(self._bar_len), '=' * int(
@@ -562,3 +937,12 @@ class Simulation:
                 self.log.wrn(write_str)
                 break
         return
+
+
+# Simulation evaluated by forked worker processes
+_pool_sim = None
+
+
+def _pool_evaluate(n):
+    """ Evaluate one experiment realization in a worker process """
+    return _pool_sim._evaluate_realization(n)
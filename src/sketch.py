@@ -0,0 +1,194 @@
+# Built-in modules
+import numpy as np
+
+
+class Sketch:
+    """
+    Sketch object estimates quantiles of a stream of values in bounded
+    memory, and keeps the exact running count, mean, and variance
+
+    Values are held in compactors, one per level, where an item at level
+    h stands for 2^h input values. When a level holds more than 'k' items,
+    it is sorted and every other item is promoted to the next level. Each
+    such compaction shifts the rank of any value by at most 2^h, and the
+    sum of these shifts is tracked as rank_err(). Sketches are mergeable,
+    so sketches of separate workers or shards can be combined with merge()
+
+    Args:
+    k (int): compactor capacity. Defaults to 1024
+
+    Attributes:
+    n (int): number of non-NaN values
+    mean (float): mean of the non-NaN values
+    nnan (int): number of NaN values
+    """
+    def __init__(self, k=1024):
+        # Store passed parameters
+        self._k = int(k)
+
+        self.n = 0
+        self.mean = 0.
+        self.nnan = 0
+        # Sum of squared deviations from the mean
+        self._m2 = 0.
+        # Compactor items and the offset of the next compaction per level
+        self._levels = [np.empty(0)]
+        self._offsets = [0]
+        # Upper bound on the rank error, in number of values
+        self._err = 0
+
+    # ***** Public Methods *****
+    @staticmethod
+    def capacity(rank_err, nval):
+        """
+        Smallest compactor capacity that keeps the normalized rank error of
+        a sketch of 'nval' values below 'rank_err'. Level h is compacted at
+        most nval / (k 2^h) times, so every level contributes at most
+        nval / k to the rank error
+
+        Args:
+        rank_err (float): normalized rank error, between 0 and 1
+        nval (int): number of values that will be added
+        """
+        k = 2
+        while (np.log2(max(nval / float(k), 1.)) + 1.) / k > rank_err:
+            k *= 2
+        return k
+
+    def update(self, vals):
+        """
+        Add values to the sketch
+
+        Args:
+        vals (array): values to add
+        """
+        vals = np.ravel(np.asarray(vals, dtype=np.float64))
+        nan = np.isnan(vals)
+        self.nnan += int(np.sum(nan))
+        vals = vals[~nan]
+        if len(vals) == 0:
+            return
+        mean = np.mean(vals)
+        self._add_moments(len(vals), mean, np.sum((vals - mean)**2))
+        self._levels[0] = np.concatenate((self._levels[0], vals))
+        self._compress()
+        return
+
+    def merge(self, other):
+        """
+        Merge another sketch into this one
+
+        Args:
+        other (src.Sketch): sketch to merge
+        """
+        self.nnan += other.nnan
+        if other.n == 0:
+            return
+        self._add_moments(other.n, other.mean, other._m2)
+        while len(self._levels) < len(other._levels):
+            self._levels.append(np.empty(0))
+            self._offsets.append(0)
+        for h, items in enumerate(other._levels):
+            self._levels[h] = np.concatenate((self._levels[h], items))
+        self._err += other._err
+        self._compress()
+        return
+
+    def var(self):
+        """ Variance of the non-NaN values """
+        if self.n == 0:
+            return np.nan
+        return self._m2 / float(self.n)
+
+    def rank_err(self):
+        """ Upper bound on the normalized rank error of percentile() """
+        if self.n == 0:
+            return 0.
+        return self._err / float(self.n)
+
+    def percentile(self, pcts):
+        """
+        Estimate percentiles, interpolating linearly between values as
+        np.percentile does. Exact as long as no compaction happened.
+        Returns NaN if any NaN values were added, as np.percentile does
+
+        Args:
+        pcts (list): percentiles, between 0 and 100
+        """
+        pcts = np.asarray(pcts, dtype=np.float64)
+        if self.nnan > 0 or self.n == 0:
+            return np.full(pcts.shape, np.nan)
+        items = np.concatenate(self._levels)
+        wts = np.concatenate([
+            np.full(len(lev), 2.**h) for h, lev in enumerate(self._levels)])
+        order = np.argsort(items, kind="mergesort")
+        items = items[order]
+        wts = wts[order]
+        # Center rank of each item among the values it stands for
+        ranks = np.cumsum(wts) - 0.5 * (wts + 1.)
+        return np.interp(pcts / 100. * (self.n - 1), ranks, items)
+
+    def to_array(self):
+        """ Pack the sketch into a float64 array """
+        head = [self._k, self.n, self.mean, self._m2, self.nnan,
+                self._err, len(self._levels)]
+        return np.concatenate((
+            np.array(head, dtype=np.float64),
+            np.array(self._offsets, dtype=np.float64),
+            np.array([len(items) for items in self._levels],
+                     dtype=np.float64),
+            *self._levels))
+
+    @classmethod
+    def from_array(cls, arr):
+        """
+        Unpack a sketch packed by to_array()
+
+        Args:
+        arr (array): packed sketch
+        """
+        arr = np.asarray(arr, dtype=np.float64)
+        sketch = cls(int(arr[0]))
+        sketch.n = int(arr[1])
+        sketch.mean = float(arr[2])
+        sketch._m2 = float(arr[3])
+        sketch.nnan = int(arr[4])
+        sketch._err = int(arr[5])
+        nlev = int(arr[6])
+        sketch._offsets = arr[7:7 + nlev].astype(int).tolist()
+        lens = arr[7 + nlev:7 + 2 * nlev].astype(int)
+        bounds = 7 + 2 * nlev + np.concatenate(([0], np.cumsum(lens)))
+        sketch._levels = [arr[bounds[h]:bounds[h + 1]].copy()
+                          for h in range(nlev)]
+        return sketch
+
+    # ***** Helper Methods *****
+    def _add_moments(self, n, mean, m2):
+        """ Combine count, mean, and squared deviations with another set """
+        tot = self.n + n
+        delta = mean - self.mean
+        self.mean += delta * n / float(tot)
+        self._m2 += m2 + delta**2 * self.n * n / float(tot)
+        self.n = tot
+        return
+
+    def _compress(self):
+        """ Compact every level that holds more than k items """
+        h = 0
+        while h < len(self._levels):
+            items = self._levels[h]
+            if len(items) > self._k:
+                if h + 1 == len(self._levels):
+                    self._levels.append(np.empty(0))
+                    self._offsets.append(0)
+                items = np.sort(items)
+                npair = len(items) - len(items) % 2
+                # Alternate which item of each pair is promoted
+                off = self._offsets[h]
+                self._offsets[h] = 1 - off
+                self._levels[h + 1] = np.concatenate(
+                    (self._levels[h + 1], items[off:npair:2]))
+                self._levels[h] = items[npair:]
+                self._err += 2**h
+            h += 1
+        return
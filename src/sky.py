@@ -1,15 +1,5 @@
 # Built-in modules
 import numpy as np
-import sys as sy
-try:
-    import h5py as hp
-except ImportError:
-    sy.stderr(
-        "BoloCalc Import Error: h5py not installed.\n"
-        "As of BoloCalc v0.10.0, h5py is used to load ATM profiles\n"
-        "Use pip to install via 'pip install h5py'\n"
-        "Or, if using an Anaconda environment, 'conda install h5py'\n")
-import os
 
 # BoloCalc modules
 import src.foregrounds as fg
@@ -33,7 +23,8 @@ class Sky:
         self._phys = self.tel.exp.sim.phys
         self._load = self.tel.exp.sim.load
         self._infg = self.tel.exp.sim.param("infg")
-        self._atm_file = self.tel.exp.sim.atm_file
+        self._atm_interp = self.tel.exp.sim.param("atm_interp")
+        self._atm = self.tel.exp.sim.atm
 
         # Initialize foregrounds
         if self._infg:
@@ -49,20 +40,23 @@ class Sky:
             "ATACAMA", "POLE", "MCMURDO", "SPACE", "CUST"]
 
     # ***** Public Methods ******
-    def evaluate(self, sky_temp, pwv, elev, freqs):
+    def evaluate(self, sky_temp, pwv, elev, freqs, atm=None):
         """
-        Generate the sky elements, absorbtivities, transmissions,
-        and temperatures
+        Generate the sky element names, absorbtivities, transmissions,
+        and temperatures. Names are given once per element, while the
+        other quantities are given per frequency
 
         Args:
         pwv (float): PWV
         elev (float): elevation
         freqs (float): frequencies [Hz] at which to evlauate the sky
+        atm (tuple): ATM (temperature, transmission) spectra to use
+        instead of looking them up. Defaults to None
         """
         site = self.tel.param("site").upper()
         # Custom sky effective brightness temperature
         if sky_temp != "NA":
-            Nsky = ['Sky' for f in freqs]
+            Nsky = 'Sky'
             Tsky = [sky_temp for f in freqs]
             Esky = [1. for f in freqs]
             Asky = [1. for f in freqs]
@@ -73,8 +67,11 @@ class Sky:
         elif site in self._allowed_sites:
             # Check that an atmosphere exists
             if site != 'SPACE':
-                Natm = ['ATM' for f in freqs]
-                Tatm, Eatm = self._atm_spectrum(pwv, elev, freqs)[1:]
+                Natm = 'ATM'
+                if atm is None:
+                    Tatm, Eatm = self._atm_spectrum(pwv, elev, freqs)[1:]
+                else:
+                    Tatm, Eatm = atm
                 Aatm = [1. for f in freqs]
             # Won't look at the atmosphere from space, probably
             else:  # site = 'SPACE'
@@ -86,17 +83,17 @@ class Sky:
                     site.lower().capitalize(), self.tel.name,
                     ', '.join(self._allowed_sites)))
 
-        Ncmb = ['CMB' for f in freqs]
+        Ncmb = 'CMB'
         Tcmb = [self._phys.Tcmb for f in freqs]
         Ecmb = [1. for f in freqs]
         Acmb = [1. for f in freqs]
         # Include foregrounds
         if self._infg:
-            Nsyn = ['SYNC' for f in freqs]
+            Nsyn = 'SYNC'
             Tsyn = self._syn_temp(freqs)
             Esyn = [1. for f in freqs]
             Asyn = [1. for f in freqs]
-            Ndst = ['DUST' for f in freqs]
+            Ndst = 'DUST'
             Tdst = self._dst_temp(freqs)
             Edst = [1. for f in freqs]
             Adst = [1. for f in freqs]
@@ -123,9 +120,53 @@ class Sky:
                         [Ecmb],
                         [Tcmb]]
 
-    def pwv_sample(self):
-        """ Sample the PWV distribution """
-        samp = self.tel.pwv_sample()
+    def evaluate_elevs(self, sky_temp, pwv, elevs, freqs):
+        """
+        Generate the sky element names, absorbtivities, transmissions,
+        and temperatures for several elevations at once. Returns the
+        element names followed by arrays with shape (nelev, nelem, nfreq)
+
+        Args:
+        sky_temp (float): custom sky brightness temperature or 'NA'
+        pwv (float): PWV
+        elevs (list): elevations
+        freqs (float): frequencies [Hz] at which to evlauate the sky
+        """
+        site = self.tel.param("site").upper()
+        nelev = len(elevs)
+        # Atmosphere spectra for each elevation
+        atm = None
+        if (sky_temp == "NA" and site in self._allowed_sites and
+           site != "SPACE"):
+            if self._atm_interp and self.tel.param("atm_file") is None:
+                m_to_um = 1.e+06
+                Eatm, Tatm = self._atm.interpolate(
+                    self._hdf5_site(), pwv * m_to_um, elevs, freqs)
+            else:
+                Tatm, Eatm = np.transpose([
+                    self._atm_spectrum(pwv, elev, freqs)[1:]
+                    for elev in elevs], (1, 0, 2))
+            atm = (Tatm[0], Eatm[0])
+        # Elevation-independent elements
+        elem, emis, tran, temp = self.evaluate(
+            sky_temp, pwv, elevs[0], freqs, atm=atm)
+        emis = np.tile(np.array(emis, dtype=np.float), (nelev, 1, 1))
+        tran = np.tile(np.array(tran, dtype=np.float), (nelev, 1, 1))
+        temp = np.tile(np.array(temp, dtype=np.float), (nelev, 1, 1))
+        if atm is not None:
+            tran[:, -1] = Eatm
+            temp[:, -1] = Tatm
+        return [elem, emis, tran, temp]
+
+    def pwv_sample(self, rng=None):
+        """
+        Sample the PWV distribution
+
+        Args:
+        rng (np.random.Generator): random generator to sample with.
+        Defaults to None, which uses the global numpy random state
+        """
+        samp = self.tel.pwv_sample(rng)
         # Minimum allowed PWV is 0 mm
         if samp < self._min_pwv:
             self._log.log('Cannot have PWV %.1f < %.1f. Using %.1f instead'
@@ -140,20 +181,18 @@ class Sky:
             return samp
 
     # ***** Helper Methods *****
-    def _hdf5_select(self, pwv, elev):
-        """ Retrieve ATM spectrum from HDF5 file """
-        # Two-level dictionary structure in the HDF5 file
+    def _hdf5_site(self):
+        """ Site name as labeled in the HDF5 file """
         site = self.tel.param("site").lower().capitalize()
         # McMurdo need camel casing
         if site == "Mcmurdo":
             site = "McMurdo"
-        key = "%d,%d" % (pwv, elev)
-        with hp.File("%s" % (self._atm_file), "r") as hf:
-            data = hf[site][key]
-            freq = data[0]
-            temp = data[2]
-            tran = data[3]
-        return (freq, tran, temp)
+        return site
+
+    def _hdf5_select(self, pwv, elev):
+        """ Retrieve ATM spectrum from HDF5 file """
+        # Two-level dictionary structure in the HDF5 file
+        return self._atm.spectrum(self._hdf5_site(), pwv, elev)
 
     def _atm_spectrum(self, pwv, elev, freqs):
         """ Atmosphere spectrum given a PWV and elevation """
@@ -162,7 +201,7 @@ class Sky:
         mm_to_um = 1.e+03
         # Load custom ATM file if present
         if self.tel.param("atm_file") is not None:
-            freq, tran, temp = self._load.atm(self.tel.param("atm_file"))
+            freq, temp, tran = self._load.atm(self.tel.param("atm_file"))
         # Otherwise, select the atmosphere from the HDF5 file
         else:
             freq, tran, temp = self._hdf5_select(
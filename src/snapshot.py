@@ -0,0 +1,176 @@
+# Built-in modules
+import numpy as np
+import glob as gb
+import hashlib as hl
+import io
+import pickle as pk
+import sys as sy
+import os
+
+# BoloCalc modules
+import src.camera as cm
+
+
+class Snapshot:
+    """
+    Snapshot object caches parsed camera trees in the '.bolocalc'
+    directory of the experiment, so that later runs load each camera in one
+    read instead of parsing its config, band, and PDF files. A snapshot is
+    keyed by a hash of every file in the camera config directory, the
+    simulation inputs, and the BoloCalc source, so cameras whose inputs
+    changed are rebuilt and the others are loaded
+
+    Snapshots are pickles that leave out the parent telescope and the
+    simulation-wide objects, such as the logger and loader, which are
+    restored from the objects of the current run
+
+    The snapshot directory is trusted local state: unpickling a planted
+    file runs arbitrary code. The cache is therefore off unless enabled
+    by the 'Snapshot Cache' simulation input, which should only be done
+    for experiment directories that nobody else can write to
+
+    Args:
+    sim (src.Simulation): parent Simulation object
+
+    Attributes:
+    dir (str): snapshot directory
+    """
+    def __init__(self, sim):
+        # Store passed parameters
+        self._sim = sim
+        self._log = self._sim.log
+        self._use = self._sim.param("snap")
+
+        self.dir = os.path.join(self._sim.exp_dir, ".bolocalc")
+        # Hash of the inputs that every snapshot depends on
+        self._context = None
+
+    # ***** Public Methods *****
+    def camera(self, tel, cam_dir):
+        """
+        Load a camera from its snapshot, or build it and store a snapshot
+
+        Args:
+        tel (src.Telescope): parent Telescope object
+        cam_dir (str): camera directory
+        """
+        if not self._use:
+            return cm.Camera(tel, cam_dir)
+        snap_dir = os.path.join(
+            self.dir, tel.name, cam_dir.rstrip(os.sep).split(os.sep)[-1])
+        fname = os.path.join(snap_dir, "%s.pkl" % (self._key(cam_dir)))
+        if os.path.isfile(fname):
+            try:
+                with open(fname, "rb") as f:
+                    cam = self.loads(f.read(), sim=self._sim, tel=tel)
+                self._log.log(
+                    "Loaded camera %s from snapshot '%s'" % (cam_dir, fname))
+                return cam
+            except (OSError, EOFError, AttributeError, ImportError,
+                    pk.UnpicklingError):
+                self._log.log(
+                    "Could not load camera snapshot '%s'. Rebuilding camera "
+                    "%s" % (fname, cam_dir))
+        cam = cm.Camera(tel, cam_dir)
+        self._save(fname, self.dumps(cam, sim=self._sim, tel=tel))
+        return cam
+
+    def dumps(self, obj, **roots):
+        """
+        Pickle an object, leaving out the passed root objects and their
+        attributes, which the copy shares
+
+        Args:
+        obj (object): object to pickle
+        roots (dict): shared objects, keyed by name
+        """
+        buf = io.BytesIO()
+        ExpPickler(buf, self._shared(roots)).dump(obj)
+        return buf.getvalue()
+
+    def loads(self, data, **roots):
+        """
+        Copy of an object pickled by dumps() with the same root names
+
+        Args:
+        data (bytes): pickled object
+        roots (dict): shared objects, keyed by name
+        """
+        return ExpUnpickler(io.BytesIO(data), self._shared(roots)).load()
+
+    # ***** Helper Methods *****
+    def _shared(self, roots):
+        """ Root objects and their non-primitive attributes, by name """
+        ret = {}
+        for name, root in roots.items():
+            ret[name] = root
+            for key, val in vars(root).items():
+                if not isinstance(val, (bool, int, float, str, type(None))):
+                    ret["%s.%s" % (name, key)] = val
+        return ret
+
+    def _key(self, cam_dir):
+        """ Hash of the camera config files and the context """
+        if self._context is None:
+            self._context = self._context_hash()
+        sha = hl.sha1(self._context.encode())
+        sha.update(cam_dir.encode())
+        config_dir = os.path.join(cam_dir, "config")
+        for root, dirs, files in os.walk(config_dir):
+            dirs.sort()
+            for fname in sorted(files):
+                path = os.path.join(root, fname)
+                sha.update(os.path.relpath(path, config_dir).encode())
+                with open(path, "rb") as f:
+                    sha.update(f.read())
+        return sha.hexdigest()[:16]
+
+    def _context_hash(self):
+        """ Hash of the simulation inputs and the BoloCalc source """
+        inps = sorted(self._sim.input_params().items())
+        sha = hl.sha1(repr(inps).encode())
+        sha.update(("%s %s" % (sy.version, np.__version__)).encode())
+        src_dir = os.path.dirname(os.path.abspath(__file__))
+        for fname in sorted(gb.glob(os.path.join(src_dir, "*.py"))):
+            with open(fname, "rb") as f:
+                sha.update(f.read())
+        return sha.hexdigest()
+
+    def _save(self, fname, data):
+        """ Write a snapshot, replacing older snapshots of the camera """
+        snap_dir = os.path.dirname(fname)
+        try:
+            if not os.path.isdir(snap_dir):
+                os.makedirs(snap_dir)
+            # Write to a temporary file first, as parallel runs may share
+            # the snapshot directory
+            tmp = "%s.%d.tmp" % (fname, os.getpid())
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, fname)
+            for old in gb.glob(os.path.join(snap_dir, "*.pkl")):
+                if old != fname:
+                    os.remove(old)
+        except OSError:
+            self._log.log("Could not write camera snapshot '%s'" % (fname))
+        return
+
+
+class ExpPickler(pk.Pickler):
+    """ Pickler that stores shared objects by their name """
+    def __init__(self, f, shared):
+        super().__init__(f, protocol=pk.HIGHEST_PROTOCOL)
+        self._ids = {id(obj): name for name, obj in shared.items()}
+
+    def persistent_id(self, obj):
+        return self._ids.get(id(obj))
+
+
+class ExpUnpickler(pk.Unpickler):
+    """ Unpickler that restores shared objects from their name """
+    def __init__(self, f, shared):
+        super().__init__(f)
+        self._shared = shared
+
+    def persistent_load(self, pid):
+        return self._shared[pid]
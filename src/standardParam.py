@@ -9,14 +9,20 @@ class StandardParam:
     inp_min (float): minimum allowed value. Defaults to None
     inp_max (float): maximum allowe value. Defaults to None
     inp_type (type): cast parameter data type. Defaults to numpy.float
+    stage (str): first src.Sensitivity stage that the parameter feeds,
+    one of src.Sensitivity.stages. Defaults to 'spectra', for which the
+    spectra of the parameter's telescope, camera, or channel are
+    re-evaluated when the parameter changes
     """
-    def __init__(self, name, unit, inp_min, inp_max, inp_type):
+    def __init__(self, name, unit, inp_min, inp_max, inp_type,
+                 stage="spectra"):
         # Store passed values
         self.name = name
         self.unit = unit
         self.min = inp_min
         self.max = inp_max
         self.type = inp_type
+        self.stage = stage
 
         # Store derived parameters
         self.caps_name = self.name.replace(" ", "").strip().upper()
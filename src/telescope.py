@@ -1,10 +1,10 @@
 # Built-in modules
+import numpy as np
 import glob as gb
 import os
 
 # BoloCalc modules
 import src.parameter as pr
-import src.camera as cm
 import src.sky as sk
 import src.scanStrategy as sc
 
@@ -20,6 +20,8 @@ class Telescope:
 
     Attributes:
     dir (str): where arg 'inp_dir' is stored
+    rng (np.random.Generator): random generator for parameter sampling.
+    Defaults to None, which uses the global numpy random state
 
     Parents:
     exp (src.Experiment): Experiment object
@@ -37,6 +39,8 @@ class Telescope:
         self._log = self.exp.sim.log
         self._load = self.exp.sim.load
         self._std_params = self.exp.sim.std_params
+        self._tim = self.exp.sim.timer
+        self.rng = None
 
         self._log.log("Generating telescope realization from %s" % (self.dir))
         # Check whether telescope and config dir exists
@@ -61,10 +65,11 @@ class Telescope:
         """ Evaluate telescope """
         self._log.log(
             "Evaluating telescope %s" % (self.dir))
-        # Evaluate parameter values
-        self._store_param_vals()
-        # Handle the atmosphere
-        self._handle_atm()
+        with self._tim.time("sample", self.name):
+            # Evaluate parameter values
+            self._store_param_vals()
+            # Handle the atmosphere
+            self._handle_atm()
         # Evaluate cameras
         self._log.log(
             "Evaluating cameras in telescope %s"
@@ -73,6 +78,30 @@ class Telescope:
             cam.evaluate()
         return
 
+    def set_seed(self, seed_seq):
+        """
+        Give this telescope and its children independent random generators
+
+        Args:
+        seed_seq (np.random.SeedSequence): seed sequence for this telescope
+        """
+        self.rng = np.random.default_rng(seed_seq)
+        seqs = seed_seq.spawn(len(self.cams))
+        for cam, seq in zip(self.cams.values(), seqs):
+            cam.set_seed(seq)
+        return
+
+    def needs_atm(self):
+        """
+        Whether this telescope observes through an ATM spectrum from the
+        HDF5 atmosphere file, rather than from space, through a custom ATM,
+        or with a fixed sky temperature
+        """
+        site = str(self._param_dict["site"].get_avg()).strip().upper()
+        sky_temp = str(self._param_dict["sky_temp"].get_avg()).strip()
+        return (sky_temp.upper() == "NA" and site != "SPACE" and
+                "CUST" not in site)
+
     def param(self, param):
         """
         Return telescope parameter value
@@ -82,6 +111,19 @@ class Telescope:
         """
         return self._param_vals[param]
 
+    def resample(self, param):
+        """
+        Re-sample one telescope parameter, leaving the other parameters
+        and the sky as they are
+
+        Args:
+        param (str): name of parameter or param dict key
+        """
+        if param not in self._param_dict.keys():
+            param = self._param_names[param.replace(" ", "").strip().upper()]
+        self._param_vals[param] = self._param_samp(self._param_dict[param])
+        return
+
     def change_param(self, param, new_val):
         """
         Change telescope parameter value
@@ -112,26 +154,50 @@ class Telescope:
                     "Parameter '%s' not understood by Telescope.change_param()"
                     % (str(param)))
 
-    def sky_temp_sample(self):
-        """ Sample sky temperature for this telescope """
+    def sky_temp_sample(self, rng=None):
+        """
+        Sample sky temperature for this telescope
+
+        Args:
+        rng (np.random.Generator): random generator to sample with.
+        Defaults to None, which uses the telescope's generator
+        """
+        if rng is None:
+            rng = self.rng
         if self.exp.sim.param("nobs") == 1:
             return self._param_dict["sky_temp"].get_med()
         else:
-            return self._param_dict["sky_temp"].sample(nsample=1)
+            return self._param_dict["sky_temp"].sample(nsample=1, rng=rng)
+
+    def pwv_sample(self, rng=None):
+        """
+        Sample PWV for this telescope
 
-    def pwv_sample(self):
-        """ Sample PWV for this telescope """
+        Args:
+        rng (np.random.Generator): random generator to sample with.
+        Defaults to None, which uses the telescope's generator
+        """
+        if rng is None:
+            rng = self.rng
         if self.exp.sim.param("nobs") == 1:
             return self._param_dict["pwv"].get_med()
         else:
-            return self._param_dict["pwv"].sample(nsample=1)
+            return self._param_dict["pwv"].sample(nsample=1, rng=rng)
 
-    def elev_sample(self):
-        """ Sample elevation for this telescope """
+    def elev_sample(self, rng=None):
+        """
+        Sample elevation for this telescope
+
+        Args:
+        rng (np.random.Generator): random generator to sample with.
+        Defaults to None, which uses the telescope's generator
+        """
+        if rng is None:
+            rng = self.rng
         if self.exp.sim.param("nobs") == 1:
             return self._param_dict["elev"].get_med()
         else:
-            return self._param_dict["elev"].sample(nsample=1)
+            return self._param_dict["elev"].sample(nsample=1, rng=rng)
 
     # ***** Helper Methods *****
     def _check_dirs(self):
@@ -224,7 +290,7 @@ class Telescope:
         for i in range(len(cam_names)):
             cam_name_upper = cam_names[i].replace(" ", "").strip().upper()
             self.cams.update({cam_name_upper:
-                              cm.Camera(self, cam_dirs[i])})
+                              self.exp.sim.snap.camera(self, cam_dirs[i])})
         return
 
     def _param_samp(self, param):
@@ -232,7 +298,7 @@ class Telescope:
         if self.exp.sim.param("nexp") == 1:
             return param.get_med()
         else:
-            return param.sample(nsample=1)
+            return param.sample(nsample=1, rng=self.rng)
 
     def _handle_atm(self):
         """ Handle the atmosphere for balloons and space """
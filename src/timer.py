@@ -0,0 +1,132 @@
+# Built-in modules
+import numpy as np
+import contextlib as cl
+import datetime as dt
+import json as js
+import sys as sy
+import time as tm
+
+
+class Timer:
+    """
+    Timer object accumulates the wall time, CPU time, and number of calls
+    of each phase of a run, such as parameter sampling, sky evaluation, or
+    a sensitivity stage, separately for each telescope, camera, and
+    channel that it ran for. Phases may nest, e.g. a parameter vary step
+    contains the sensitivity stages that it recalculates
+
+    Args:
+    log (src.Log): Log object
+
+    Attributes:
+    nreal (int): number of experiment realizations calculated
+    """
+    def __init__(self, log):
+        # Store passed parameters
+        self._log = log
+
+        self.nreal = 0
+        # [wall, cpu, calls] keyed by (phase, scope)
+        self._recs = {}
+        self._wall = tm.perf_counter()
+        self._cpu = tm.process_time()
+
+    # ***** Public Methods *****
+    @cl.contextmanager
+    def time(self, phase, *scope):
+        """
+        Time the enclosed block as a phase
+
+        Args:
+        phase (str): phase name
+        scope (str): names of the telescope, camera, and channel
+        that the phase runs for, from the outermost
+        """
+        wall = tm.perf_counter()
+        cpu = tm.process_time()
+        try:
+            yield
+        finally:
+            self.add(phase, "/".join([str(s) for s in scope]),
+                     tm.perf_counter() - wall, tm.process_time() - cpu)
+
+    def add(self, phase, scope, wall, cpu, calls=1):
+        """
+        Add time spent in a phase
+
+        Args:
+        phase (str): phase name
+        scope (str): telescope/camera/channel path, or '' for the run
+        wall (float): wall time [s]
+        cpu (float): CPU time [s]
+        calls (int): number of calls. Defaults to 1
+        """
+        rec = self._recs.setdefault((phase, scope), [0., 0., 0])
+        rec[0] += wall
+        rec[1] += cpu
+        rec[2] += calls
+        return
+
+    def pop(self):
+        """
+        Return the timings accumulated since the last pop() and reset
+        them, such that worker processes can pass them to merge()
+        """
+        ret = self._recs
+        self._recs = {}
+        return ret
+
+    def merge(self, recs):
+        """
+        Add timings returned by pop()
+
+        Args:
+        recs (dict): timings returned by pop()
+        """
+        for (phase, scope), rec in recs.items():
+            self.add(phase, scope, *rec)
+        return
+
+    def report(self, fname, info=None):
+        """
+        Write the timings to a JSON file, totaled per phase and listed
+        per telescope, camera, and channel. Phase CPU times include those
+        of worker processes, while the total CPU time is of this process
+
+        Args:
+        fname (str): JSON file name
+        info (dict): extra entries to write, such as the experiment
+        directory and the number of jobs. Defaults to None
+        """
+        ret = {"date": dt.datetime.now().isoformat(),
+               "python": sy.version.split()[0],
+               "numpy": np.__version__}
+        if info is not None:
+            ret.update(info)
+        ret.update({
+            "realizations": self.nreal,
+            "wall": tm.perf_counter() - self._wall,
+            "cpu": tm.process_time() - self._cpu})
+        totals = {}
+        for (phase, scope), rec in self._recs.items():
+            tot = totals.setdefault(phase, [0., 0., 0])
+            for i in range(3):
+                tot[i] += rec[i]
+        ret["phases"] = {
+            phase: self._entry(rec) for phase, rec in sorted(totals.items())}
+        scopes = {}
+        for (phase, scope), rec in sorted(self._recs.items()):
+            scopes.setdefault(scope, {})[phase] = self._entry(rec)
+        ret["scopes"] = scopes
+        with open(fname, "w") as f:
+            js.dump(ret, f, indent=2)
+        self._log.out("Wrote timing report to '%s'" % (fname))
+        return
+
+    # ***** Helper Methods *****
+    def _entry(self, rec):
+        """ Report entry for [wall, cpu, calls] """
+        wall, cpu, calls = rec
+        return {"wall": wall, "cpu": cpu, "calls": calls,
+                "realizations_per_sec": (
+                    self.nreal / wall if wall > 0. else None)}
@@ -1,11 +1,12 @@
 # Built-in modules
+import multiprocessing as mp
 import numpy as np
 import sys as sy
-import copy as cp
 import os
 
 # BoloCalc modules
 import src.experiment as ex
+import src.results as rs
 import src.unit as un
 
 
@@ -30,6 +31,7 @@ class Vary:
         self._sns = self._sim.sns
         self._exp = self._sim.exp
         self._log = self._sim.log
+        self._tim = self._sim.timer
         self._ph = self._sim.phys
         self._param_file = param_file
         self._vary_name = vary_name
@@ -45,6 +47,17 @@ class Vary:
         self._scope_enums = {
             'exp': 3, 'tel': 2, 'cam': 1, 'ch': 0,
             'opt': 0, 'pix': 0}
+        # Sensitivity keys of the parameters that can be swept as an array
+        # axis. Derived parameters, such as Tc or the detector number, and
+        # parameters that change the spectra are varied one set at a time
+        self._sweep_keys = {
+            'PSAT': 'psat', 'PSATFACTOR': 'psat_fact', 'CARRIERINDEX': 'n',
+            'G': 'g', 'FLINK': 'flink', 'SQUIDNEI': 'nei',
+            'BOLORESISTANCE': 'bolo_r', 'READNOISEFRAC': 'read_frac',
+            'RESPFACTOR': 'sfact', 'OPTICALCOUPLING': 'opt_coup',
+            'YIELD': 'yield', 'NETMARGIN': 'net_mgn',
+            'OBSERVATIONTIME': 'tobs', 'SKYFRACTION': 'fsky',
+            'OBSERVATIONEFFICIENCY': 'obs_eff'}
 
         # Name of parameter vary directory
         self._param_dir = "paramVary"
@@ -54,10 +67,23 @@ class Vary:
 
         # Load parameters to vary
         self._load_params()
+        # Telescopes may be moved onto an HDF5 atmosphere site by varying
+        # the site or sky temperature, so locate the atm file up front,
+        # before any worker processes are forked
+        if self._sim.atm_file is None and any([
+                param.replace(" ", "").upper() in ["SITE", "SKYTEMPERATURE"]
+                for param in self._params]):
+            self._sim.locate_atm()
 
     # **** Public methods ****
-    def vary(self):
-        """ Run parmaeter vary simulation """
+    def vary(self, jobs=1):
+        """
+        Run parmaeter vary simulation
+
+        Args:
+        jobs (int): number of worker processes over which to spread the
+        (realization, parameter set) pairs. Defaults to 1, which runs serially
+        """
         # Start by generating "fiducial" experiments
         tot_sims = (self._sim.param("nexp") * self._sim.param("ndet") *
                     self._sim.param("nobs"))
@@ -69,37 +95,64 @@ class Vary:
                    self._sim.param("nobs"), tot_sims)))
         self._exps = []
         self._sens = []
+        self._snaps = []
         for n in range(self._nexp):
             self._status(n, self._nexp)
-            exp = ex.Experiment(self._sim)
-            exp.evaluate()
-            sns = self._sim.sns.sensitivity(exp)
-            self._exps.append(exp)
-            self._sens.append(sns)
+            with self._tim.time("vary_fiducial"):
+                exp = ex.Experiment(self._sim)
+                self._sim.seed_exp(exp, n)
+                exp.evaluate()
+                sns = self._sim.sns.sensitivity(exp)
+                self._exps.append(exp)
+                self._sens.append(sns)
+                self._snaps.append(self._snapshot(exp))
+            self._tim.nreal += 1
         self._done()
 
-        # Loop over parameter set and adjust sensitivities
-        adj_sns = []
-        tot_adjs = self._nexp * len(self._set_arr)
+        # Loop over parameter set and adjust sensitivities,
+        # storing them in one results container per parameter set
+        self.adj_results = [
+            rs.Results(self._exps[0], self._nexp, self._sim.param("nobs"),
+                       self._sim.param("ndet"))
+            for i in range(len(self._set_arr))]
+        units = [(n, i) for n in range(self._nexp)
+                 for i in range(len(self._set_arr))]
         self._log.out((
                 "Looping over %d parameter sets for %d realizations. "
                 "Number of experiment realizations to adjust = %d"
                 % (len(self._set_arr), self._sim.param("nexp"),
-                   tot_adjs)))
-        for n, (exp, sens) in enumerate(zip(self._exps, self._sens)):
-            adj_sns.append(self._vary_exp(exp, sens, n, tot_adjs))
+                   len(units))))
+        sweep = self._sweep_key()
+        if sweep is not None:
+            self._vary_sweep(sweep)
+        elif jobs > 1 and len(units) > 1:
+            if "fork" in mp.get_all_start_methods():
+                self._vary_parallel(jobs, units)
+            else:
+                self._log.wrn(
+                    "Process forking is not available on this platform. "
+                    "Adjusting the %d experiment realizations serially"
+                    % (len(units)))
+                jobs = 1
+        if sweep is None and (jobs <= 1 or len(units) <= 1):
+            for u, (n, i) in enumerate(units):
+                self._status(u, len(units))
+                with self._tim.time("vary_adjust"):
+                    self.adj_results[i].store(n, self._vary_unit(n, i))
+                self._tim.nreal += 1
+        self._sim.atm.log_stats()
         self._done()
 
-        # Combine and save experiment realizations
-        self.adj_sns = np.concatenate(adj_sns, axis=-1)
-        self._save()
+        # Save experiment realizations
+        with self._tim.time("vary_save"):
+            self._save()
         return
 
     # ***** Helper methods *****
     def _save(self):
         """ Save simulation outputs to files """
         # Write parameter by parameter
-        tot_writes = len(self.adj_sns)
+        tot_writes = len(self.adj_results)
         self._log.out((
                 "Writing outputs for %d parameters" % (tot_writes)))
         for i in range(tot_writes):
@@ -108,12 +161,27 @@ class Vary:
         self._done()
         return
 
-    def _adjust_sens(self, exp, sns, tel='', cam='', ch='', opt=''):
+    def _adjust_sens(self, exp, sns, tel='', cam='', ch='', opt='',
+                     stage="spectra"):
         """ Calculate new sensitivity array where needed """
         tel = self._cap(tel)
         cam = self._cap(cam)
         ch = self._cap(ch)
         opt = self._cap(opt)
+        # Restart the affected channels from a later stage
+        if stage != "spectra":
+            for tel_ind, telescope in enumerate(exp.tels.values()):
+                if tel != '' and telescope is not exp.tels[tel]:
+                    continue
+                for cam_ind, camera in enumerate(telescope.cams.values()):
+                    if cam != '' and camera is not telescope.cams[cam]:
+                        continue
+                    for ch_ind, channel in enumerate(camera.chs.values()):
+                        if ch != '' and channel is not camera.chs[ch]:
+                            continue
+                        sns[tel_ind][cam_ind][ch_ind] = (
+                            self._sns.ch_sensitivity(channel, stage))
+            return sns
         # Change channel parameter
         if str(tel) != '' and str(cam) != '' and str(ch) != '':
             tel_ind = list(exp.tels.keys()).index(tel)
@@ -170,7 +238,7 @@ class Vary:
                         channel.evaluate()
                         sns[tel_ind][cam_ind][ch_ind] = (
                             self._sns.ch_sensitivity(channel))
-        return cp.deepcopy(sns)
+        return sns
 
     def _set_new_pix_sz(self, cam, ch, tup):
         """ Set new pixel size for given camera and channel """
@@ -246,6 +314,25 @@ class Vary:
             band_ind=ch.band_ind, num_bands=len(ch.cam.chs)))
         return np.any(changed)
 
+    def _stage(self, j):
+        """
+        First sensitivity stage that parameter 'j' feeds. Experiment,
+        optic, and pixel size parameters always change the spectra
+        """
+        if self._vary_scope(j) not in ['tel', 'cam', 'ch']:
+            return "spectra"
+        return self._sim.std_params[self._cap(self._params[j])].stage
+
+    def _owner(self, exp, j):
+        """ Telescope, camera, or channel that holds parameter 'j' """
+        tel = exp.tels[self._cap(self._tels[j])]
+        if self._cams[j] == '':
+            return tel
+        cam = tel.cams[self._cap(self._cams[j])]
+        if self._chs[j] == '':
+            return cam
+        return cam.chs[self._cap(self._chs[j])]
+
     def _set_new_param(self, exp, tup):
         """ Set new parameter value for given experiment """
         i = tup[0]
@@ -298,41 +385,188 @@ class Vary:
             changed = self._set_new_pix_sz(cam, ch, (i, j))
         return changed
 
-    def _vary_exp(self, exp, sns, n, ntot):
-        """ Set new parameter combinations for defined experiment """
-        # Sensitivity for every parameter combination
-        sns_arr = []
-        # Loop over long-form data
-        for i in range(len(self._set_arr)):
-            self._status((n * len(self._set_arr) + i), ntot)
-            changes = []
-            # First adjust parameters
-            for j in range(len(self._set_arr[i])):
-                changed = self._set_new_param(exp, (i, j))
-                changes.append(changed)
-            # Where changes happened
-            changed_args = np.argwhere(changes).flatten()
-            chg_tels = self._tels[changed_args]
-            chg_cams = self._cams[changed_args]
-            chg_chs = self._chs[changed_args]
-            chg_opts = self._opts[changed_args]
-            # Only account for unique changes
-            chgs = np.array([chg_tels, chg_cams, chg_chs, chg_opts]).T
-            # If no changes occurred, move to the next parameter step
-            if len(chgs) == 0:
-                sns_arr.append(cp.deepcopy(sns))
-                continue
-            unique_chgs = np.unique(chgs, axis=0)
-            # Store new sensitivity values
-            for unique_chg in unique_chgs:
-                out_sns = self._adjust_sens(exp, sns, *unique_chg)
-            sns_arr.append(out_sns)
-        return sns_arr
+    def _vary_unit(self, n, i):
+        """
+        Return the sensitivities of experiment realization 'n' with
+        parameter set 'i'. A copy of the fiducial experiment is changed and
+        reseeded by (n, i), so the output does not depend on which other
+        parameter sets were evaluated before, or in which process
+        """
+        exp = self._restore(self._snaps[n])
+        self._sim.seed_exp(exp, n, i)
+        sns = [[list(cam) for cam in tel] for tel in self._sens[n]]
+        changes = []
+        # First adjust parameters
+        for j in range(len(self._set_arr[i])):
+            changed = self._set_new_param(exp, (i, j))
+            changes.append(changed)
+        # Where changes happened
+        changed_args = np.argwhere(changes).flatten()
+        chg_tels = self._tels[changed_args]
+        chg_cams = self._cams[changed_args]
+        chg_chs = self._chs[changed_args]
+        chg_opts = self._opts[changed_args]
+        # Only account for unique changes
+        chgs = np.array([chg_tels, chg_cams, chg_chs, chg_opts]).T
+        # If no changes occurred, keep the fiducial sensitivities
+        if len(chgs) == 0:
+            return sns
+        # Parameters that only feed later stages are re-sampled on their
+        # own, and the earlier stages are not recalculated
+        stages = [self._stage(j) for j in changed_args]
+        for j, stage in zip(changed_args, stages):
+            if stage != "spectra":
+                self._owner(exp, j).resample(self._params[j])
+        unique_chgs, inv = np.unique(chgs, axis=0, return_inverse=True)
+        # Store new sensitivity values
+        for u, unique_chg in enumerate(unique_chgs):
+            stage = min(
+                [stages[c] for c in np.argwhere(inv == u).flatten()],
+                key=self._sns.stages.index)
+            sns = self._adjust_sens(exp, sns, *unique_chg, stage=stage)
+        return sns
+
+    def _sweep_key(self):
+        """
+        Sensitivity key of the varied parameter if every parameter set can
+        be calculated at once along a sweep axis, and None otherwise. This
+        requires a single telescope, camera, or channel parameter that
+        feeds a stage after the spectra and has no spread, so that it takes
+        exactly the set value in every realization
+        """
+        if self._num_params != 1 or self._vary_scope(0) not in [
+           'tel', 'cam', 'ch']:
+            return None
+        key = self._sweep_keys.get(self._cap(self._params[0]))
+        if key is None or self._stage(0) == "spectra":
+            return None
+        exp = self._restore(self._snaps[0])
+        self._set_new_param(exp, (0, 0))
+        self._owner(exp, 0).resample(self._params[0])
+        samps = self._sweep_samples(exp, key)
+        if not np.all(samps == self._sweep_vals()[0]):
+            return None
+        return key
+
+    def _sweep_vals(self):
+        """ SI values of the varied parameter for each parameter set """
+        unit = self._sim.std_params[self._cap(self._params[0])].unit
+        return np.array([
+            unit.to_SI(float(val)) for val in self._set_arr[:, 0]])
+
+    def _sweep_chs(self, exp):
+        """ Indices and objects of the channels the varied parameter feeds """
+        owner = self._owner(exp, 0)
+        ret = []
+        for tel_ind, tel in enumerate(exp.tels.values()):
+            for cam_ind, cam in enumerate(tel.cams.values()):
+                for ch_ind, ch in enumerate(cam.chs.values()):
+                    if owner in [tel, cam, ch]:
+                        ret.append((tel_ind, cam_ind, ch_ind, ch))
+        return ret
+
+    def _sweep_samples(self, exp, key):
+        """ Sampled values of the varied parameter in its channels """
+        ret = []
+        for _, _, _, ch in self._sweep_chs(exp):
+            if key in ch.det_dict.keys():
+                ret += [det.param(key) for det in ch.det_arr.dets]
+            else:
+                ret.append(self._owner(exp, 0).param(key))
+        return np.array(ret, dtype=object)
+
+    def _vary_sweep(self, key):
+        """
+        Adjust every parameter set of each fiducial experiment at once,
+        carrying the varied parameter values as a leading array axis of
+        the sensitivity calculation. Sets whose values equal the fiducial
+        value to five significant figures, which Parameter.change() does
+        not count as a change, keep the fiducial sensitivities
+        """
+        self._log.log(
+            "Sweeping '%s' over %d parameter sets as an array axis"
+            % (self._params[0], len(self._set_arr)))
+        vals = self._sweep_vals()
+        stage = self._stage(0)
+        for n in range(self._nexp):
+            self._status(n, self._nexp)
+            exp = self._exps[n]
+            fid = self._sweep_samples(exp, key)
+            changed = np.array([
+                not all([self._same(val, samp) for samp in fid])
+                for val in vals])
+            with self._tim.time("vary_sweep"):
+                outs = [
+                    (tel_ind, cam_ind, ch_ind,
+                     self._sns.ch_sweep(ch, {key: vals}, stage))
+                    for tel_ind, cam_ind, ch_ind, ch in self._sweep_chs(exp)]
+            for i in range(len(self._set_arr)):
+                sns = [[list(cam) for cam in tel] for tel in self._sens[n]]
+                if changed[i]:
+                    for tel_ind, cam_ind, ch_ind, out in outs:
+                        sns[tel_ind][cam_ind][ch_ind] = out[i]
+                self.adj_results[i].store(n, sns)
+            self._tim.nreal += len(self._set_arr)
+        return
+
+    def _same(self, val, samp):
+        """
+        Whether a new value equals a sampled value to the five significant
+        figures that Parameter.change() compares
+        """
+        if isinstance(samp, str):
+            return False
+        return self._sig_figs(val, 5) == self._sig_figs(samp, 5)
+
+    def _sig_figs(self, inp, sig):
+        """ Return an input with a specified number of sig figs """
+        if inp == 0:
+            return inp
+        return round(inp, sig-int(np.floor(np.log10(abs(inp))))-1)
+
+    def _vary_parallel(self, jobs, units):
+        """
+        Adjust (realization, parameter set) pairs in 'jobs' forked worker
+        processes, which inherit the fiducial experiments copy-on-write.
+        Outputs are gathered in order
+        """
+        self._log.log(
+            "Adjusting %d experiment realizations using %d processes"
+            % (len(units), jobs))
+        # Flush buffered messages so that they are not duplicated by workers
+        self._log.flush()
+        # Set aside timings so that they are not duplicated by workers
+        times = self._tim.pop()
+        global _pool_vary
+        _pool_vary = self
+        ctx = mp.get_context("fork")
+        chunk = max(1, len(units) // (4 * jobs))
+        with ctx.Pool(processes=min(jobs, len(units))) as pool:
+            for u, ((n, i), (sns, recs)) in enumerate(zip(
+                    units, pool.imap(_pool_vary_unit, units, chunk))):
+                self._status(u, len(units))
+                self.adj_results[i].store(n, sns)
+                self._tim.merge(recs)
+                self._tim.nreal += 1
+        self._tim.merge(times)
+        _pool_vary = None
+        return
+
+    def _snapshot(self, exp):
+        """
+        Pickle an experiment, leaving out the simulation-wide objects,
+        such as the logger, loader, and atmosphere, which copies share
+        """
+        return self._sim.snap.dumps(exp, sim=self._sim)
+
+    def _restore(self, snap):
+        """ Independent copy of an experiment pickled by _snapshot() """
+        return self._sim.snap.loads(snap, sim=self._sim)
 
     def _save_param_iter(self, it):
         """ Save sensitiviy for this parameter iteration """
         exp = self._exps[0]  # Just for retrieving names
-        sns = self.adj_sns[it]
+        sns = self.adj_results[it].sens
         # Write output files for every channel
         if str(self._scope) != 'exp':  # Overall scope of vary
             tel_names = list(set(self._tels))  # unique tels
@@ -642,6 +876,9 @@ class Vary:
                               % (self._param_file))
         else:
             self._pix_size_special = False
+        # Overall scope of the vary, which sets which outputs are saved
+        for j in range(self._num_params):
+            self._vary_scope(j)
         return
 
     def _vary_scope(self, ind):
@@ -719,3 +956,15 @@ class Vary:
     def _cap(self, inp):
         """ Captialize a string and strip spaces """
         return str(inp).replace(" ", "").strip().upper()
+
+
+# Vary object whose fiducial experiments forked workers adjust
+_pool_vary = None
+
+
+def _pool_vary_unit(unit):
+    """ Adjust one (realization, parameter set) pair in a worker process """
+    with _pool_vary._tim.time("vary_adjust"):
+        sns = _pool_vary._vary_unit(*unit)
+    _pool_vary._log.flush()
+    return sns, _pool_vary._tim.pop()